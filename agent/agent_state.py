@@ -0,0 +1,212 @@
+import threading
+import logging
+import json
+import fcntl
+import os
+import struct
+import time
+import zlib
+from datetime import datetime
+from config import AGENT_STATE_DIR, AGENT_STATE_SNAPSHOT_SECONDS
+
+logging.basicConfig(filename="cosmos_trading_agent.log", level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Every record on disk is a header (payload length, sequence number, CRC32) followed by a zlib-compressed
+# JSON payload. A torn or corrupt record fails its length or CRC check, and reading stops there.
+_HEADER = struct.Struct("<IQI")
+
+def _encode(seq, payload):
+    body = zlib.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+    return _HEADER.pack(len(body), seq, zlib.crc32(body)) + body
+
+def _read_records(path):
+    """Return ([(seq, payload)], intact_length) for path, stopping at the first damaged record."""
+    if not os.path.exists(path):
+        return [], 0
+    with open(path, "rb") as f:
+        data = f.read()
+    records = []
+    offset = 0
+    while offset + _HEADER.size <= len(data):
+        length, seq, crc = _HEADER.unpack_from(data, offset)
+        body = data[offset + _HEADER.size:offset + _HEADER.size + length]
+        if len(body) < length or zlib.crc32(body) != crc:
+            break
+        records.append((seq, json.loads(zlib.decompress(body))))
+        offset += _HEADER.size + length
+    if offset < len(data):
+        logging.warning(json.dumps({"event": "agent_state_truncated", "path": path, "offset": offset}))
+    return records, offset
+
+def _fsync_dir(path):
+    """Flush a directory's entries, making a rename inside it durable."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def encode_state(subaccount_id, portfolio, trends):
+    """Serializable runtime state of one agent; entry times are stored as epoch seconds."""
+    return {
+        "subaccount_id": subaccount_id,
+        "trends": dict(trends),
+        "portfolio": {
+            token: {**position, "entry_time": position["entry_time"].timestamp()}
+            for token, position in portfolio.items()
+        }
+    }
+
+def decode_portfolio(portfolio):
+    return {
+        token: {**position, "entry_time": datetime.fromtimestamp(position["entry_time"])}
+        for token, position in portfolio.items()
+    }
+
+class AgentStateStore:
+    """
+    Crash-consistent local snapshots of agent runtime state, keyed by user_id.
+
+    record() appends the agent's full state to a journal, so replay is last-write-wins per user. A
+    background thread periodically compacts the latest states into a snapshot (written to a temp file,
+    fsynced and renamed into place) and truncates the journal. The snapshot stores the last journal
+    sequence it covers, so a crash between the rename and the truncation cannot apply old entries twice.
+
+    The files have a single writer: the first process to load or record takes an exclusive lock on
+    agents.lock for its lifetime. Under several gunicorn workers only that one persists and restores
+    agent state; the others log a warning and run without it rather than interleaving sequence numbers
+    in the journal or truncating records they did not write.
+    """
+
+    def __init__(self, state_dir=AGENT_STATE_DIR, snapshot_seconds=AGENT_STATE_SNAPSHOT_SECONDS):
+        self.state_dir = state_dir
+        self.snapshot_seconds = snapshot_seconds
+        self._lock = threading.Lock()
+        self._states = {}
+        self._seq = 0
+        self._journal = None
+        self._dirty = False
+        self._compactor_started = False
+        self._lock_file = None
+        self._writer = None  # None until the lock is tried, then whether this process owns the files
+
+    @property
+    def lock_path(self):
+        return os.path.join(self.state_dir, "agents.lock")
+
+    @property
+    def snapshot_path(self):
+        return os.path.join(self.state_dir, "agents.snapshot")
+
+    @property
+    def journal_path(self):
+        return os.path.join(self.state_dir, "agents.journal")
+
+    def _owns_files(self):
+        """Take the writer lock on first use; call with self._lock held."""
+        if self._writer is None:
+            os.makedirs(self.state_dir, exist_ok=True)
+            self._lock_file = open(self.lock_path, "a")
+            try:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                self._writer = True
+            except BlockingIOError:
+                self._lock_file.close()
+                self._lock_file = None
+                self._writer = False
+                logging.warning(json.dumps({"event": "agent_state_locked", "path": self.lock_path, "pid": os.getpid()}))
+        return self._writer
+
+    def load(self):
+        """
+        Read the snapshot and replay the journal; return {user_id: state} for every known agent.
+
+        Returns nothing in a process that does not own the state files.
+        """
+        with self._lock:
+            if not self._owns_files():
+                return {}
+            states = {}
+            snapshot_seq = 0
+            snapshot, _ = _read_records(self.snapshot_path)
+            for seq, payload in snapshot:
+                snapshot_seq = seq
+                states = {user_id: state for user_id, state in payload}
+            replayed = 0
+            last_seq = snapshot_seq
+            journal, intact_length = _read_records(self.journal_path)
+            if os.path.exists(self.journal_path) and intact_length < os.path.getsize(self.journal_path):
+                os.truncate(self.journal_path, intact_length)  # Drop a torn tail so new records stay readable
+            for seq, payload in journal:
+                if seq <= snapshot_seq:
+                    continue
+                if payload.get("state") is None:
+                    states.pop(payload["user_id"], None)
+                else:
+                    states[payload["user_id"]] = payload["state"]
+                last_seq = seq
+                replayed += 1
+            self._states = states
+            self._seq = last_seq
+            self._dirty = replayed > 0
+        logging.info(json.dumps({"event": "agent_state_loaded", "agents": len(states), "journal_entries": replayed}))
+        return {user_id: dict(state) for user_id, state in states.items()}
+
+    def record(self, user_id, state, durable=False):
+        """
+        Journal one agent's state (None forgets the agent).
+
+        Position changes pass durable=True so they are fsynced before the caller moves on; trend-only
+        updates can be lost in a crash without harm.
+        """
+        with self._lock:
+            if not self._owns_files():
+                return
+            if self._journal is None:
+                self._journal = open(self.journal_path, "ab")
+            self._seq += 1
+            self._journal.write(_encode(self._seq, {"user_id": user_id, "state": state}))
+            self._journal.flush()
+            if durable:
+                os.fsync(self._journal.fileno())
+            if state is None:
+                self._states.pop(user_id, None)
+            else:
+                self._states[user_id] = state
+            self._dirty = True
+            if not self._compactor_started:
+                self._compactor_started = True
+                threading.Thread(target=self._run_compactor, daemon=True).start()
+
+    def _run_compactor(self):
+        while True:
+            time.sleep(self.snapshot_seconds)
+            try:
+                self.snapshot()
+            except Exception as e:
+                logging.error(json.dumps({"event": "agent_state_snapshot_failed", "error": str(e)}))
+
+    def snapshot(self):
+        """Write all current states to the snapshot file and, once it is durably in place, truncate the journal."""
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp_path = self.snapshot_path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(_encode(self._seq, list(self._states.items())))  # pairs keep integer user IDs intact
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+            # The rename must be durable before the journal is emptied, or a power loss could keep the
+            # truncation but not the new snapshot and lose every change since the previous one
+            _fsync_dir(self.state_dir)
+            if self._journal is not None:
+                self._journal.close()
+            self._journal = open(self.journal_path, "wb")
+            os.fsync(self._journal.fileno())
+            self._dirty = False
+            agents = len(self._states)
+        logging.info(json.dumps({"event": "agent_state_snapshot", "agents": agents}))
+
+agent_state_store = AgentStateStore()
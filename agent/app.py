@@ -1,19 +1,36 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_cors import CORS
+from itsdangerous import URLSafeTimedSerializer, BadSignature
 import threading
+import schedule
+import time
 import logging
 import json
+import csv
+import hmac
+import io
+from datetime import datetime, timedelta
 from trading_agent import UserAgent, get_atom_capital
 from auth import signup
-from db import get_user_id_from_session, load_users, update_user, get_all_trades, get_platform_stats
-from config import SECRET_KEY, ALLOWED_ORIGINS
+from db import (get_user_id_from_session, load_users, update_user, get_all_trades, get_recent_trades, iter_trades, TRADE_EXPORT_COLUMNS,
+                ensure_trade_partitions, archive_closed_trade_partitions, get_user_trade_stats,
+                backfill_user_trade_stats, user_trade_stats_need_backfill, ensure_trade_stats_tables)
+from platform_stats import platform_stats_view
+from profiling import profile_registry, ProfilerBusy
+from agent_state import agent_state_store
+from risk_book import risk_book
+from status_stream import status_hub
+from factor_store import factor_store, COLUMNS as FACTOR_STORE_COLUMNS
+from config import (SECRET_KEY, ALLOWED_ORIGINS, PLATFORM_STATS_MAX_AGE, ADMIN_TOKEN, STATUS_STREAM_TOKEN_SECONDS,
+                    FACTOR_SCORES_DEFAULT_DAYS, STATUS_TRADE_HISTORY_LIMIT)
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = SECRET_KEY
 limiter = Limiter(get_remote_address, app=app, default_limits=["100 per day", "10 per hour"])
 CORS(app, origins=ALLOWED_ORIGINS)
+stream_tokens = URLSafeTimedSerializer(SECRET_KEY, salt="status-stream")
 
 logging.basicConfig(filename="cosmos_trading_agent.log", level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - %(message)s')
@@ -21,6 +38,22 @@ logging.basicConfig(filename="cosmos_trading_agent.log", level=logging.INFO,
 agents = {}
 agents_lock = threading.Lock()
 
+@app.before_request
+def start_route_profile():
+    if profile_registry.active() and request.endpoint:
+        g.route_profile = profile_registry.profile("route", request.endpoint)
+        g.route_profile.__enter__()
+
+@app.teardown_request
+def stop_route_profile(exc):
+    route_profile = g.pop("route_profile", None)
+    if route_profile is not None:
+        route_profile.__exit__(None, None, None)
+
+def is_admin():
+    token = request.headers.get("admin_token")
+    return bool(ADMIN_TOKEN and token and hmac.compare_digest(token, ADMIN_TOKEN))
+
 @app.route('/signup', methods=['POST'])
 @limiter.limit("5 per minute")
 def signup_route():
@@ -33,7 +66,7 @@ def signup_route():
         return jsonify({"error": message}), 401 if message == "Invalid or expired signature" else 400
     with agents_lock:
         user_id = get_user_id_from_session(session_id)
-        default_indicators, default_weights = get_platform_defaults()
+        default_indicators, default_weights = platform_stats_view.defaults()
         agents[user_id] = UserAgent(user_id, wallet_address, wallet_seed, get_atom_capital(wallet_address),
                                     indicators=default_indicators, weights=default_weights)
     return jsonify({
@@ -57,6 +90,7 @@ def pause_user():
         if user_id not in agents:
             return jsonify({"error": "User agent not found"}), 404
         agents[user_id].paused = True
+        agents[user_id].publish_status()
         update_user(user_id, paused=True)
     return jsonify({"message": "Agent paused"}), 200
 
@@ -74,6 +108,7 @@ def unpause_user():
             return jsonify({"error": "User agent not found"}), 404
         agents[user_id].paused = False
         agents[user_id].start()
+        agents[user_id].publish_status()
         update_user(user_id, paused=False)
     return jsonify({"message": "Agent unpaused"}), 200
 
@@ -87,23 +122,59 @@ def get_status():
     if not user_id:
         return jsonify({"error": "Invalid session_id"}), 401
     with agents_lock:
-        if user_id not in agents:
-            return jsonify({"error": "User agent not found"}), 404
-        user = agents[user_id]
-        trades = get_all_trades(user_id)
-        return jsonify({
-            "user_id": user.user_id,
-            "wallet_address": user.wallet_address,
-            "paused": user.paused,
-            "total_capital": user.total_capital,
-            "bridged_capital": user.bridged_capital,
-            "active_capital": user.active_capital,
-            "indicators": user.indicators,
-            "weights": user.weights,
-            "trends": user.trends,
-            "portfolio": user.portfolio,
-            "trade_history": trades
-        }), 200
+        user = agents.get(user_id)
+    if user is None:
+        return jsonify({"error": "User agent not found"}), 404
+    status = user.status_snapshot()
+    # Polled often, so only the newest trades; /users/trades/export streams the full history
+    trades = get_recent_trades(user_id, STATUS_TRADE_HISTORY_LIMIT)
+    return jsonify({**status, "trade_history": trades}), 200
+
+@app.route('/users/status/stream-token', methods=['POST'])
+@limiter.limit("30 per minute")
+def create_status_stream_token():
+    # EventSource cannot send custom headers; this token lets it authenticate the stream URL without
+    # putting the session_id in a query string that proxies and access logs record
+    session_id = request.headers.get("session_id")
+    if not session_id:
+        return jsonify({"error": "Missing session_id header"}), 401
+    user_id = get_user_id_from_session(session_id)
+    if not user_id:
+        return jsonify({"error": "Invalid session_id"}), 401
+    return jsonify({"token": stream_tokens.dumps(user_id), "expires_in": STATUS_STREAM_TOKEN_SECONDS}), 200
+
+@app.route('/users/status/stream', methods=['GET'])
+@limiter.limit("30 per minute")
+def stream_status():
+    session_id = request.headers.get("session_id")
+    if session_id:
+        user_id = get_user_id_from_session(session_id)
+    elif request.args.get("token"):
+        try:
+            user_id = stream_tokens.loads(request.args["token"], max_age=STATUS_STREAM_TOKEN_SECONDS)
+        except BadSignature:
+            user_id = None
+    else:
+        return jsonify({"error": "Missing session_id header or stream token"}), 401
+    if not user_id:
+        return jsonify({"error": "Invalid or expired credentials"}), 401
+    with agents_lock:
+        user = agents.get(user_id)
+    if user is None:
+        return jsonify({"error": "User agent not found"}), 404
+    if not status_hub.open_slot():
+        return jsonify({"error": "Too many open status streams"}), 503, {"Retry-After": "30"}
+    try:
+        if not status_hub.has(user_id):
+            user.publish_status()
+        events = status_hub.stream(user_id, request.headers.get("Last-Event-ID"))
+        response = Response(stream_with_context(events), mimetype="text/event-stream",
+                            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+        response.call_on_close(status_hub.close_slot)  # Runs even if the client leaves before the first event
+    except Exception:
+        status_hub.close_slot()  # No response will close it, so hand the slot back here
+        raise
+    return response
 
 @app.route('/users/config', methods=['GET'])
 @limiter.limit("10 per minute")
@@ -115,32 +186,33 @@ def get_user_config():
     if not user_id:
         return jsonify({"error": "Invalid session_id"}), 401
     with agents_lock:
-        if user_id not in agents:
-            return jsonify({"error": "User agent not found"}), 404
-        user = agents[user_id]
-        config = {
-            "technical_analysis": {
-                "ict": {"weight": user.weights["ict"], "description": "Institutional Candle Theory framework"},
-                "elliott": {"weight": user.weights["elliott"], "description": "Wave pattern analysis"},
-                "ema": {"weight": user.weights["ema"], "description": "EMA crossovers and trends"},
-                "rsi": {"weight": user.weights["rsi"], "description": "Relative Strength Index"},
-                "wyckoff": {"weight": user.weights["wyckoff"], "description": "Market structure analysis"}
-            },
-            "fundamental_analysis": {
-                "tokenomics": {"weight": user.weights["tokenomics"], "description": "Token supply and distribution metrics"},
-                "onchain": {"weight": user.weights["onchain"], "description": "Network usage and transaction volume"},
-                "ecosystem": {"weight": user.weights["ecosystem"], "description": "Development activity and adoption"},
-                "tvl": {"weight": user.weights["tvl"], "description": "Total Value Locked growth patterns"}
-            },
-            "market_sentiment": {
-                "social": {"weight": user.weights["social"], "description": "Mentions across social platforms"},
-                "whale": {"weight": user.weights["whale"], "description": "Large holder activity"},
-                "market": {"weight": user.weights["market"], "description": "Overall market mood and direction"},
-                "funding": {"weight": user.weights["funding"], "description": "Perpetual swap funding rates"}
-            },
-            "total_weight": sum(user.weights.values())
-        }
-        return jsonify(config), 200
+        user = agents.get(user_id)
+    if user is None:
+        return jsonify({"error": "User agent not found"}), 404
+    weights = dict(user.weights)
+    config = {
+        "technical_analysis": {
+            "ict": {"weight": weights["ict"], "description": "Institutional Candle Theory framework"},
+            "elliott": {"weight": weights["elliott"], "description": "Wave pattern analysis"},
+            "ema": {"weight": weights["ema"], "description": "EMA crossovers and trends"},
+            "rsi": {"weight": weights["rsi"], "description": "Relative Strength Index"},
+            "wyckoff": {"weight": weights["wyckoff"], "description": "Market structure analysis"}
+        },
+        "fundamental_analysis": {
+            "tokenomics": {"weight": weights["tokenomics"], "description": "Token supply and distribution metrics"},
+            "onchain": {"weight": weights["onchain"], "description": "Network usage and transaction volume"},
+            "ecosystem": {"weight": weights["ecosystem"], "description": "Development activity and adoption"},
+            "tvl": {"weight": weights["tvl"], "description": "Total Value Locked growth patterns"}
+        },
+        "market_sentiment": {
+            "social": {"weight": weights["social"], "description": "Mentions across social platforms"},
+            "whale": {"weight": weights["whale"], "description": "Large holder activity"},
+            "market": {"weight": weights["market"], "description": "Overall market mood and direction"},
+            "funding": {"weight": weights["funding"], "description": "Perpetual swap funding rates"}
+        },
+        "total_weight": sum(weights.values())
+    }
+    return jsonify(config), 200
 
 @app.route('/users/trades', methods=['GET'])
 @limiter.limit("10 per minute")
@@ -154,6 +226,49 @@ def get_user_trades():
     trades = get_all_trades(user_id)
     return jsonify({"trades": trades}), 200
 
+def export_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, default=str) + "\n"
+
+def export_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(TRADE_EXPORT_COLUMNS)
+    yield buffer.getvalue()  # An export with no trades is still a valid CSV with its header
+    buffer.seek(0)
+    buffer.truncate(0)
+    for row in rows:
+        writer.writerow([json.dumps(row[col]) if col == "factor_scores" else row[col] for col in TRADE_EXPORT_COLUMNS])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+
+@app.route('/users/trades/export', methods=['GET'])
+@limiter.limit("10 per minute")
+def export_user_trades():
+    session_id = request.headers.get("session_id")
+    if not session_id:
+        return jsonify({"error": "Missing session_id header"}), 401
+    user_id = get_user_id_from_session(session_id)
+    if not user_id:
+        return jsonify({"error": "Invalid session_id"}), 401
+    export_format = request.args.get("format", "ndjson")
+    if export_format not in ("ndjson", "csv"):
+        return jsonify({"error": "format must be ndjson or csv"}), 400
+    try:
+        start = datetime.fromisoformat(request.args["start"]) if request.args.get("start") else None
+        end = datetime.fromisoformat(request.args["end"]) if request.args.get("end") else None
+    except ValueError:
+        return jsonify({"error": "start and end must be ISO format timestamps"}), 400
+    rows = iter_trades(user_id, start=start, end=end, token=request.args.get("token"))
+    if export_format == "csv":
+        body, mimetype = export_csv(rows), "text/csv"
+    else:
+        body, mimetype = export_ndjson(rows), "application/x-ndjson"
+    return Response(stream_with_context(body), mimetype=mimetype, headers={
+        "Content-Disposition": f"attachment; filename=trades_{user_id}.{export_format}"
+    })
+
 @app.route('/users/close-position', methods=['POST'])
 @limiter.limit("10 per minute")
 def close_position():
@@ -171,6 +286,7 @@ def close_position():
         if user_id not in agents:
             return jsonify({"error": "User agent not found"}), 404
         agents[user_id].close_position(token)
+        agents[user_id].publish_status()
     return jsonify({"message": f"Position for {token} closed"}), 200
 
 @app.route('/users/pnl', methods=['GET'])
@@ -182,12 +298,20 @@ def get_pnl():
     user_id = get_user_id_from_session(session_id)
     if not user_id:
         return jsonify({"error": "Invalid session_id"}), 401
-    trades = get_all_trades(user_id)
-    total_profit = sum(trade["profit"] for trade in trades if trade["exit_time"])
-    initial_capital = get_atom_capital(agents[user_id].wallet_address) if user_id in agents else 1000
+    stats = get_user_trade_stats(user_id)
+    total_profit = stats["total_profit"]
+    with agents_lock:
+        user = agents.get(user_id)
+    # The agent refreshes total_capital from the chain every cycle; never hit RPC on the request path
+    initial_capital = user.total_capital if user else 1000
     pnl_absolute = total_profit
     pnl_percentage = (total_profit / initial_capital * 100) if initial_capital else 0
-    return jsonify({"pnl_absolute": pnl_absolute, "pnl_percentage": pnl_percentage}), 200
+    windows = {
+        window: {"pnl_absolute": summary["total_profit"],
+                 "pnl_percentage": (summary["total_profit"] / initial_capital * 100) if initial_capital else 0}
+        for window, summary in stats["windows"].items()
+    }
+    return jsonify({"pnl_absolute": pnl_absolute, "pnl_percentage": pnl_percentage, "windows": windows}), 200
 
 @app.route('/users/win-rate', methods=['GET'])
 @limiter.limit("10 per minute")
@@ -198,22 +322,79 @@ def get_user_win_rate():
     user_id = get_user_id_from_session(session_id)
     if not user_id:
         return jsonify({"error": "Invalid session_id"}), 401
-    trades = get_all_trades(user_id)
-    total_trades = len(trades)
-    winning_trades = sum(1 for trade in trades if trade["profit"] > 0 and trade["exit_time"])
+    stats = get_user_trade_stats(user_id)
+    closed_trades = stats["closed_trades"]
+    winning_trades = stats["winning_trades"]
     win_rate_absolute = winning_trades
-    win_rate_percentage = (winning_trades / total_trades * 100) if total_trades else 0
-    return jsonify({"win_rate_absolute": win_rate_absolute, "win_rate_percentage": win_rate_percentage}), 200
+    win_rate_percentage = (winning_trades / closed_trades * 100) if closed_trades else 0
+    windows = {
+        window: {"win_rate_absolute": summary["winning_trades"],
+                 "win_rate_percentage": (summary["winning_trades"] / summary["closed_trades"] * 100) if summary["closed_trades"] else 0}
+        for window, summary in stats["windows"].items()
+    }
+    return jsonify({"win_rate_absolute": win_rate_absolute, "win_rate_percentage": win_rate_percentage,
+                    "closed_trades": closed_trades, "windows": windows}), 200
+
+def platform_stats_response(resource, payload):
+    response = jsonify(payload)
+    response.set_etag(platform_stats_view.etag(resource))
+    response.cache_control.public = True
+    response.cache_control.max_age = PLATFORM_STATS_MAX_AGE
+    return response.make_conditional(request)
 
 @app.route('/platform/win-rate', methods=['GET'])
 @limiter.limit("10 per minute")
 def get_platform_win_rate():
-    stats = get_platform_stats()
-    total_trades = sum(stat["total_trades"] for stat in stats.values())
-    correct_predictions = sum(stat["correct_predictions"] for stat in stats.values())
-    win_rate_absolute = correct_predictions
-    win_rate_percentage = (correct_predictions / total_trades * 100) if total_trades else 0
-    return jsonify({"win_rate_absolute": win_rate_absolute, "win_rate_percentage": win_rate_percentage}), 200
+    return platform_stats_response("win-rate", platform_stats_view.win_rate())
+
+@app.route('/platform/defaults', methods=['GET'])
+@limiter.limit("10 per minute")
+def get_platform_defaults_route():
+    indicators, weights = platform_stats_view.defaults()
+    return platform_stats_response("defaults", {"indicators": indicators, "weights": weights})
+
+@app.route('/platform/factor-attribution', methods=['GET'])
+@limiter.limit("10 per minute")
+def get_platform_factor_attribution():
+    session_id = request.headers.get("session_id")
+    if not session_id:
+        return jsonify({"error": "Missing session_id header"}), 401
+    user_id = get_user_id_from_session(session_id)
+    if not user_id:
+        return jsonify({"error": "Invalid session_id"}), 401
+    try:
+        start = datetime.fromisoformat(request.args["start"]) if request.args.get("start") else None
+        end = datetime.fromisoformat(request.args["end"]) if request.args.get("end") else None
+    except ValueError:
+        return jsonify({"error": "start and end must be ISO format timestamps"}), 400
+    window = request.args.get("window", "1D")
+    if window not in ("1h", "4h", "1D", "1W"):
+        return jsonify({"error": "window must be one of 1h, 4h, 1D, 1W"}), 400
+    from factor_analytics import get_factor_attribution  # pandas/NumPy stay out of API worker boot
+    attribution = get_factor_attribution(start=start, end=end, token=request.args.get("token"), window=window)
+    return jsonify({"window": window, "attribution": attribution}), 200
+
+@app.route('/users/factor-scores', methods=['GET'])
+@limiter.limit("30 per minute")
+def get_factor_scores():
+    session_id = request.headers.get("session_id")
+    if not session_id:
+        return jsonify({"error": "Missing session_id header"}), 401
+    user_id = get_user_id_from_session(session_id)
+    if not user_id:
+        return jsonify({"error": "Invalid session_id"}), 401
+    try:
+        start = datetime.fromisoformat(request.args["start"]) if request.args.get("start") else None
+        end = datetime.fromisoformat(request.args["end"]) if request.args.get("end") else None
+    except ValueError:
+        return jsonify({"error": "start and end must be ISO format timestamps"}), 400
+    if start is None:
+        start = (end or datetime.now()) - timedelta(days=FACTOR_SCORES_DEFAULT_DAYS)  # Never scan a user's whole history
+    table = factor_store.read(token=request.args.get("token"), user_id=user_id, start=start, end=end)
+    # Column-oriented so trend charts can plot each factor directly
+    scores = {name: table[name].to_pylist() for name in FACTOR_STORE_COLUMNS if name != "user_id"}
+    scores["cycle_time"] = [t.isoformat() for t in scores["cycle_time"]]
+    return jsonify({"start": start.isoformat(), "rows": table.num_rows, "scores": scores}), 200
 
 @app.route('/users/update-weights', methods=['POST'])
 @limiter.limit("10 per minute")
@@ -235,12 +416,70 @@ def update_weights():
         if user_id not in agents:
             return jsonify({"error": "User agent not found"}), 404
         agents[user_id].weights = {k: v for k, v in new_weights.items() if k in agents[user_id].indicators}
+        agents[user_id].publish_status()
         update_user(user_id, weights=agents[user_id].weights)
     return jsonify({"message": "Weights updated", "weights": agents[user_id].weights}), 200
 
+@app.route('/admin/profile', methods=['GET'])
+@limiter.limit("30 per minute")
+def list_profiles():
+    if not is_admin():
+        return jsonify({"error": "Forbidden"}), 403
+    return jsonify({"armed": profile_registry.armed(), "outputs": profile_registry.outputs()}), 200
+
+@app.route('/admin/profile/agent', methods=['POST'])
+@limiter.limit("30 per minute")
+def profile_agent():
+    if not is_admin():
+        return jsonify({"error": "Forbidden"}), 403
+    data = request.get_json() or {}
+    user_id = data.get("user_id")
+    with agents_lock:
+        if user_id not in agents:
+            return jsonify({"error": "User agent not found"}), 404
+    try:
+        profile_registry.arm("agent", user_id, int(data.get("cycles", 1)), data.get("mode", "sampling"))
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    except ProfilerBusy as e:
+        return jsonify({"error": str(e)}), 409
+    return jsonify({"message": f"Profiling armed for agent {user_id}"}), 200
+
+@app.route('/admin/profile/route', methods=['POST'])
+@limiter.limit("30 per minute")
+def profile_route():
+    if not is_admin():
+        return jsonify({"error": "Forbidden"}), 403
+    data = request.get_json() or {}
+    endpoint = data.get("endpoint")
+    if endpoint not in app.view_functions:
+        return jsonify({"error": "Unknown endpoint"}), 404
+    try:
+        profile_registry.arm("route", endpoint, int(data.get("requests", 1)), data.get("mode", "sampling"))
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    except ProfilerBusy as e:
+        return jsonify({"error": str(e)}), 409
+    return jsonify({"message": f"Profiling armed for route {endpoint}"}), 200
+
+@app.route('/admin/risk', methods=['GET'])
+@limiter.limit("60 per minute")
+def risk_exposure():
+    if not is_admin():
+        return jsonify({"error": "Forbidden"}), 403
+    return jsonify(risk_book.snapshot()), 200
+
+@app.route('/admin/metrics', methods=['GET'])
+@limiter.limit("60 per minute")
+def metrics():
+    if not is_admin():
+        return jsonify({"error": "Forbidden"}), 403
+    return Response(risk_book.metrics(), mimetype="text/plain; version=0.0.4")
+
 def load_agents():
     try:
         users = load_users()
+        states = agent_state_store.load()
         with agents_lock:
             for user_id, data in users.items():
                 agents[user_id] = UserAgent(
@@ -252,13 +491,50 @@ def load_agents():
                     indicators=data["indicators"],
                     weights=data["weights"],
                     bridged_capital=data["bridged_capital"],
-                    active_capital=data["active_capital"]
+                    active_capital=data["active_capital"],
+                    state=states.get(user_id)
                 )
+        logging.info(json.dumps({"event": "agents_loaded", "agents": len(users), "restored": sum(1 for user_id in users if user_id in states)}))
     except Exception as e:
         logging.error(json.dumps({"event": "load_agents_failed", "error": str(e)}))
         raise
 
+def start_trade_maintenance():
+    """
+    Keep future trades partitions created, roll old ones into the archive and compact finished days of
+    factor-score chunks once a day.
+
+    Also backfills the per-user trade aggregates once if that has never completed. This runs on
+    the same thread as archiving, so the two never move trades at the same time.
+    """
+    def run_job(job):
+        try:
+            job()
+        except Exception as e:
+            logging.error(json.dumps({"event": "trade_maintenance_failed", "job": job.__name__, "error": str(e)}))
+
+    # Until this succeeds new trades land in trades_default, which the next run re-homes
+    run_job(ensure_trade_partitions)
+    scheduler = schedule.Scheduler()
+
+    scheduler.every().day.do(run_job, ensure_trade_partitions)
+    scheduler.every().day.do(run_job, archive_closed_trade_partitions)
+    scheduler.every().day.do(run_job, factor_store.compact_previous_days)
+
+    def backfill_trade_stats_if_missing():
+        if user_trade_stats_need_backfill():
+            backfill_user_trade_stats()
+
+    def run_schedule():
+        run_job(backfill_trade_stats_if_missing)
+        while True:
+            scheduler.run_pending()
+            time.sleep(60)
+    threading.Thread(target=run_schedule, daemon=True).start()
+
 if __name__ == "__main__":
+    ensure_trade_stats_tables()  # Agents record trades as soon as they load
     load_agents()
+    start_trade_maintenance()
     app.run(host="0.0.0.0", port=5000, debug=False)
     
\ No newline at end of file
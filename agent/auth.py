@@ -1,7 +1,7 @@
 import logging
 import json
-from cosmospy import generate_wallet, verify_signature
-from db import create_user, create_session, get_platform_defaults
+from db import create_user, create_session
+from platform_stats import platform_stats_view
 from datetime import datetime, timedelta
 from bech32 import bech32_encode, convertbits
 
@@ -37,6 +37,7 @@ def signup(signature, nonce, timestamp, get_atom_capital):
         return None, "Missing required fields"
     
     # Generate a new wallet for the user
+    from cosmospy import generate_wallet
     wallet = generate_wallet()
     wallet_address = wallet["address"]  # Cosmos Hub address
     wallet_seed = wallet["seed"]
@@ -49,7 +50,7 @@ def signup(signature, nonce, timestamp, get_atom_capital):
     inj_address = derive_injective_address(wallet_address)
 
     # Fetch default indicators and weights
-    default_indicators, default_weights = get_platform_defaults()
+    default_indicators, default_weights = platform_stats_view.defaults()
 
     # Create user in the database
     user_id = create_user(wallet_address, wallet_seed, get_atom_capital(wallet_address), default_indicators, default_weights)
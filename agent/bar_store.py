@@ -0,0 +1,81 @@
+import threading
+from collections import deque
+from config import BAR_BACKFILL_HOURS, BAR_RETENTION
+
+# Higher timeframes are built locally from the hourly candles the agents already fetch, so
+# multi-timeframe analysis costs no extra candle calls.
+TIMEFRAMES = {"1h": 3600, "4h": 4 * 3600, "1D": 24 * 3600}
+
+class BarStore:
+    """
+    Per-token hourly candles plus incrementally maintained higher-timeframe OHLCV bars.
+
+    Candles are [timestamp, open, high, low, close, volume] rows with timestamps in seconds. Each new
+    hourly candle is folded into the open bar of every timeframe (or starts a new one when it crosses
+    a bucket boundary), so an update costs O(timeframes). A revision of the latest hourly candle, as
+    happens while that hour is still forming, rebuilds only the open bar of each timeframe. The newest
+    higher-timeframe bar can therefore be partial, exactly like the newest hourly candle.
+    """
+
+    def __init__(self, retention=BAR_RETENTION, hourly_retention=BAR_BACKFILL_HOURS):
+        self._lock = threading.Lock()
+        self._hourly_retention = hourly_retention
+        self._retention = retention
+        self._hourly = {}  # token -> deque of hourly candles, oldest first
+        self._bars = {}    # (token, timeframe) -> deque of bars, oldest first
+
+    def has(self, token):
+        return token in self._hourly
+
+    def update(self, token, candles):
+        """Merge a batch of hourly candles; only rows newer than (or revising) the latest are applied."""
+        with self._lock:
+            hourly = self._hourly.setdefault(token, deque(maxlen=self._hourly_retention))
+            for candle in sorted(candles, key=lambda c: c[0]):
+                candle = [float(v) for v in candle]
+                if hourly and candle[0] < hourly[-1][0]:
+                    continue
+                if hourly and candle[0] == hourly[-1][0]:
+                    if candle == hourly[-1]:
+                        continue
+                    hourly[-1] = candle
+                    for timeframe, seconds in TIMEFRAMES.items():
+                        self._rebuild_open_bar(token, timeframe, seconds)
+                else:
+                    hourly.append(candle)
+                    for timeframe, seconds in TIMEFRAMES.items():
+                        self._fold(token, timeframe, seconds, candle)
+
+    def _fold(self, token, timeframe, seconds, candle):
+        bars = self._bars.setdefault((token, timeframe), deque(maxlen=self._retention))
+        start = candle[0] - candle[0] % seconds
+        if bars and bars[-1][0] == start:
+            bar = bars[-1]
+            bar[2] = max(bar[2], candle[2])
+            bar[3] = min(bar[3], candle[3])
+            bar[4] = candle[4]
+            bar[5] += candle[5]
+        else:
+            bars.append([start, candle[1], candle[2], candle[3], candle[4], candle[5]])
+
+    def _rebuild_open_bar(self, token, timeframe, seconds):
+        bars = self._bars[(token, timeframe)]
+        start = bars[-1][0]
+        members = []
+        for candle in reversed(self._hourly[token]):
+            if candle[0] < start:
+                break
+            members.append(candle)
+        members.reverse()
+        bars[-1] = [start, members[0][1], max(c[2] for c in members), min(c[3] for c in members),
+                    members[-1][4], sum(c[5] for c in members)]
+
+    def bars(self, token, timeframe="1h", limit=50):
+        """The latest `limit` bars for token at timeframe, oldest first."""
+        if timeframe not in TIMEFRAMES:
+            raise ValueError(f"timeframe must be one of {', '.join(TIMEFRAMES)}")
+        with self._lock:
+            bars = self._bars.get((token, timeframe), ())
+            return [list(bar) for bar in list(bars)[-limit:]]
+
+bar_store = BarStore()
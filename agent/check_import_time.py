@@ -0,0 +1,61 @@
+"""
+Import-time regression check for the API entry point.
+
+Imports app.py in a fresh interpreter under `python -X importtime` and fails if the import takes
+longer than the budget or pulls in any of the heavy trading/analytics libraries, which must only
+be loaded on first use.
+
+    python check_import_time.py --budget-ms 1500
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+HEAVY_MODULES = [
+    "pandas", "ta", "tweepy", "bs4", "cosmospy", "injective", "secret_ai_sdk",
+    "pyarrow", "transformers", "torch", "grpc"
+]
+
+PROBE = (
+    "import sys, json, app; "
+    f"print(json.dumps(sorted({{m.split('.')[0] for m in sys.modules}} & set({HEAVY_MODULES!r}))))"
+)
+
+def measure(module_dir):
+    env = dict(os.environ)
+    # config.py refuses to import without these; their values don't matter for an import
+    for var in ["X_API_KEY", "X_API_SECRET", "SECRET_AI_API_KEY", "DB_USER", "DB_PASSWORD", "SECRET_KEY"]:
+        env.setdefault(var, "import-check")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        cwd=module_dir, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"importing app failed:\n{result.stderr[-2000:]}")
+    total_us = 0
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"; top-level imports have no indent
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|", 2)
+            if cumulative.strip().isdigit() and not name.startswith("  "):
+                total_us += int(cumulative.strip())
+    return total_us / 1000, json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if importing app.py got slow or heavy")
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="maximum cumulative import time")
+    args = parser.parse_args()
+
+    total_ms, heavy = measure(os.path.dirname(os.path.abspath(__file__)))
+    print(json.dumps({"import_ms": round(total_ms, 1), "budget_ms": args.budget_ms, "heavy_modules": heavy}))
+    if heavy:
+        print(f"FAIL: importing app loaded {', '.join(heavy)} at import time", file=sys.stderr)
+        sys.exit(1)
+    if total_ms > args.budget_ms:
+        print(f"FAIL: importing app took {total_ms:.0f}ms (budget {args.budget_ms:.0f}ms)", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import threading
+import logging
+import json
+from config import COSMOS_RPC, INJECTIVE_GRPC, SECRET_AI_API_KEY, SENTIMENT_LOCAL_MODEL, SENTIMENT_LOCAL_THREADS
+
+logging.basicConfig(filename="cosmos_trading_agent.log", level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Network clients are built on first use and shared by everything in the process. Their SDKs are
+# imported inside the factories so that importing the trading stack (as app.py does) stays cheap.
+_instances = {}
+_lock = threading.Lock()
+
+def _get(name, factory):
+    instance = _instances.get(name)
+    if instance is None:
+        with _lock:
+            instance = _instances.get(name)
+            if instance is None:
+                instance = factory()
+                _instances[name] = instance
+                logging.info(json.dumps({"event": "client_created", "client": name}))
+    return instance
+
+def override(**instances):
+    """Replace shared clients, e.g. with the simulation harness's stand-ins."""
+    with _lock:
+        _instances.update(instances)
+
+def _injective_network():
+    from injective.constant import Network
+    return Network.mainnet()
+
+def cosmos_client():
+    def build():
+        from cosmospy import CosmosAPI
+        return CosmosAPI(rpc_url=COSMOS_RPC)
+    return _get("cosmos_client", build)
+
+def cosmos_transaction_class():
+    def build():
+        from cosmospy import Transaction
+        return Transaction
+    return _get("cosmos_transaction_class", build)
+
+def injective_client():
+    def build():
+        from injective.client import Client
+        return Client(network=_get("injective_network", _injective_network), grpc_endpoint=INJECTIVE_GRPC)
+    return _get("injective_client", build)
+
+def injective_composer():
+    def build():
+        from injective.composer import Composer
+        return Composer(network=_get("injective_network", _injective_network).string())
+    return _get("injective_composer", build)
+
+def token_universe():
+    def build():
+        from token_universe import TokenUniverse
+        return TokenUniverse(injective_client())
+    return _get("token_universe", build)
+
+def _require_secret_ai_key():
+    if not SECRET_AI_API_KEY:
+        raise ValueError("SECRET_AI_API_KEY environment variable not set")
+
+def secret_client_async():
+    def build():
+        from secret_ai_sdk import SecretAIClientAsync
+        _require_secret_ai_key()
+        return SecretAIClientAsync(api_key=SECRET_AI_API_KEY)
+    return _get("secret_client_async", build)
+
+def secret_llm():
+    def build():
+        from secret_ai_sdk import ChatSecret
+        _require_secret_ai_key()
+        return ChatSecret(model="deepseek-coder:33b", api_key=SECRET_AI_API_KEY)
+    return _get("secret_llm", build)
+
+def sentiment_classifier():
+    def build():
+        import torch
+        from transformers import pipeline
+        if SENTIMENT_LOCAL_THREADS:
+            torch.set_num_threads(SENTIMENT_LOCAL_THREADS)
+        # CPU only (device=-1); top_k=None returns every label's probability, not just the argmax
+        return pipeline("text-classification", model=SENTIMENT_LOCAL_MODEL, device=-1, top_k=None, truncation=True)
+    return _get("sentiment_classifier", build)
@@ -0,0 +1,46 @@
+import threading
+from datetime import datetime, timedelta
+
+class Clock:
+    """
+    Process-wide source of "now" for trading logic.
+
+    Defaults to the wall clock; the simulation harness swaps in a VirtualClock so position
+    hold times and trade timestamps follow simulated time.
+    """
+
+    def __init__(self):
+        self._source = datetime.now
+
+    def now(self):
+        return self._source()
+
+    def use(self, source):
+        self._source = source.now if hasattr(source, "now") else source
+
+    def reset(self):
+        self._source = datetime.now
+
+class VirtualClock:
+    """Manually advanced clock for driving agent cycles faster than real time."""
+
+    def __init__(self, start=None):
+        self._now = start or datetime.now()
+        self._lock = threading.Lock()
+
+    def now(self):
+        with self._lock:
+            return self._now
+
+    def advance(self, seconds):
+        with self._lock:
+            self._now += timedelta(seconds=seconds)
+            return self._now
+
+def naive_local(value):
+    """Trade and cycle times are stored as naive local time (clock.now()); convert an aware bound to match."""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone().replace(tzinfo=None)
+    return value
+
+clock = Clock()
@@ -24,3 +24,61 @@ DB_PASSWORD = os.getenv("DB_PASSWORD")
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000").split(",")
 WHALE_TX_THRESHOLD = float(os.getenv("WHALE_TX_THRESHOLD", "500000"))
+PLATFORM_STATS_RECONCILE_SECONDS = int(os.getenv("PLATFORM_STATS_RECONCILE_SECONDS", "300"))
+PLATFORM_STATS_MAX_AGE = int(os.getenv("PLATFORM_STATS_MAX_AGE", "60"))
+TRADE_EXPORT_FETCH_SIZE = int(os.getenv("TRADE_EXPORT_FETCH_SIZE", "2000"))
+TRADE_ARCHIVE_DIR = os.getenv("TRADE_ARCHIVE_DIR", "trade_archive")
+TRADE_HOT_MONTHS = int(os.getenv("TRADE_HOT_MONTHS", "3"))
+TRADE_PARTITION_MONTHS_AHEAD = int(os.getenv("TRADE_PARTITION_MONTHS_AHEAD", "2"))
+FACTOR_ANALYTICS_CACHE_SECONDS = int(os.getenv("FACTOR_ANALYTICS_CACHE_SECONDS", "600"))
+FACTOR_ANALYTICS_CACHE_SIZE = int(os.getenv("FACTOR_ANALYTICS_CACHE_SIZE", "32"))
+FACTOR_ANALYTICS_DEFAULT_DAYS = int(os.getenv("FACTOR_ANALYTICS_DEFAULT_DAYS", "30"))
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "2"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "20"))
+SESSION_CACHE_SECONDS = int(os.getenv("SESSION_CACHE_SECONDS", "60"))
+COINGECKO_API_KEY = os.getenv("COINGECKO_API_KEY")
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "32"))
+HTTP_CONDITIONAL_CACHE_SIZE = int(os.getenv("HTTP_CONDITIONAL_CACHE_SIZE", "512"))
+AGENT_CYCLE_SECONDS = int(os.getenv("AGENT_CYCLE_SECONDS", "3600"))
+RATE_LIMIT_X_PER_MIN = float(os.getenv("RATE_LIMIT_X_PER_MIN", "12"))
+RATE_LIMIT_COINTELEGRAPH_PER_MIN = float(os.getenv("RATE_LIMIT_COINTELEGRAPH_PER_MIN", "30"))
+RATE_LIMIT_SECRET_AI_PER_MIN = float(os.getenv("RATE_LIMIT_SECRET_AI_PER_MIN", "60"))
+RATE_LIMIT_INJECTIVE_PER_MIN = float(os.getenv("RATE_LIMIT_INJECTIVE_PER_MIN", "600"))
+RATE_EXIT_RESERVE = float(os.getenv("RATE_EXIT_RESERVE", "0.2"))
+SENTIMENT_INGEST_SECONDS = int(os.getenv("SENTIMENT_INGEST_SECONDS", "900"))
+SENTIMENT_RETENTION_HOURS = int(os.getenv("SENTIMENT_RETENTION_HOURS", "48"))
+TOKEN_UNIVERSE_REFRESH_SECONDS = int(os.getenv("TOKEN_UNIVERSE_REFRESH_SECONDS", "900"))
+TOKEN_UNIVERSE_MAX = int(os.getenv("TOKEN_UNIVERSE_MAX", "20"))
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+PROFILE_OUTPUT_DIR = os.getenv("PROFILE_OUTPUT_DIR", "profiles")
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+BAR_BACKFILL_HOURS = int(os.getenv("BAR_BACKFILL_HOURS", "1200"))
+BAR_RETENTION = int(os.getenv("BAR_RETENTION", "200"))
+AGENT_STATE_DIR = os.getenv("AGENT_STATE_DIR", "agent_state")
+AGENT_STATE_SNAPSHOT_SECONDS = int(os.getenv("AGENT_STATE_SNAPSHOT_SECONDS", "300"))
+# Max absolute net notional per market across all agents; 0 disables the cap
+RISK_MARKET_NET_CAP = float(os.getenv("RISK_MARKET_NET_CAP", "0"))
+# Newest trades returned in /users/status; full history is served by /users/trades/export
+STATUS_TRADE_HISTORY_LIMIT = int(os.getenv("STATUS_TRADE_HISTORY_LIMIT", "50"))
+STATUS_STREAM_BACKLOG = int(os.getenv("STATUS_STREAM_BACKLOG", "100"))
+STATUS_STREAM_HEARTBEAT_SECONDS = int(os.getenv("STATUS_STREAM_HEARTBEAT_SECONDS", "15"))
+STATUS_STREAM_MAX_SECONDS = int(os.getenv("STATUS_STREAM_MAX_SECONDS", "300"))
+STATUS_STREAM_MAX_CONNECTIONS = int(os.getenv("STATUS_STREAM_MAX_CONNECTIONS", "8"))  # Per worker; each stream holds a gthread thread
+STATUS_STREAM_TOKEN_SECONDS = int(os.getenv("STATUS_STREAM_TOKEN_SECONDS", "60"))
+FACTOR_STORE_DIR = os.getenv("FACTOR_STORE_DIR", "factor_scores")
+FACTOR_STORE_FLUSH_ROWS = int(os.getenv("FACTOR_STORE_FLUSH_ROWS", "5000"))
+FACTOR_STORE_FLUSH_SECONDS = int(os.getenv("FACTOR_STORE_FLUSH_SECONDS", "300"))
+FACTOR_SCORES_DEFAULT_DAYS = int(os.getenv("FACTOR_SCORES_DEFAULT_DAYS", "7"))
+# Sentiment backend per factor: "local" (CPU classifier) or "remote" (Secret AI LLM). Web headlines
+# score the "market" factor and X posts the "social" factor
+SENTIMENT_BACKEND_WEB = os.getenv("SENTIMENT_BACKEND_WEB", "local")
+SENTIMENT_BACKEND_X = os.getenv("SENTIMENT_BACKEND_X", "local")
+SENTIMENT_LOCAL_MODEL = os.getenv("SENTIMENT_LOCAL_MODEL", "ProsusAI/finbert")
+# Every gunicorn worker loads its own copy of the local model (about 440MB resident for FinBERT) and
+# runs it on this many torch threads; 0 leaves torch's default of one thread per core in every worker
+SENTIMENT_LOCAL_THREADS = int(os.getenv("SENTIMENT_LOCAL_THREADS", "2"))
+SENTIMENT_BATCH_SIZE = int(os.getenv("SENTIMENT_BATCH_SIZE", "32"))
+SENTIMENT_BATCH_WAIT_MS = float(os.getenv("SENTIMENT_BATCH_WAIT_MS", "10"))
+SENTIMENT_CACHE_SIZE = int(os.getenv("SENTIMENT_CACHE_SIZE", "20000"))
+# Local scores closer to neutral than this are escalated to the remote LLM; 0 disables escalation
+SENTIMENT_ESCALATION_THRESHOLD = float(os.getenv("SENTIMENT_ESCALATION_THRESHOLD", "0.1"))
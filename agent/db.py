@@ -1,23 +1,65 @@
 import psycopg2
+import psycopg2.extras
+import psycopg2.pool
 from psycopg2.extras import Json
 import logging
 import json
-from config import DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD
+import threading
+import time
+from contextlib import contextmanager
+from config import (DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD, TRADE_EXPORT_FETCH_SIZE,
+                    TRADE_HOT_MONTHS, TRADE_PARTITION_MONTHS_AHEAD, DB_POOL_MIN, DB_POOL_MAX,
+                    SESSION_CACHE_SECONDS)
+from trade_archive import write_archive, read_archived_trades, archived_row_count
+from clock import clock, naive_local
 import bcrypt
 from datetime import datetime
 
 logging.basicConfig(filename="cosmos_trading_agent.log", level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - %(message)s')
 
+_pool = None
+_pool_lock = threading.Lock()
+# ThreadedConnectionPool raises when exhausted; the semaphore makes callers wait for a free slot instead
+_pool_slots = threading.BoundedSemaphore(DB_POOL_MAX)
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = psycopg2.pool.ThreadedConnectionPool(
+                    DB_POOL_MIN, DB_POOL_MAX,
+                    host=DB_HOST, port=DB_PORT, database=DB_NAME, user=DB_USER, password=DB_PASSWORD,
+                    connect_timeout=5
+                )
+    return _pool
+
+@contextmanager
 def get_db_connection():
+    """
+    Borrow a pooled connection for the duration of a with-block.
+
+    Commits on a clean exit, rolls back otherwise, and always returns the connection to the pool.
+    """
+    _pool_slots.acquire()
     try:
-        return psycopg2.connect(
-            host=DB_HOST, port=DB_PORT, database=DB_NAME, user=DB_USER, password=DB_PASSWORD,
-            connect_timeout=5
-        )
+        pool = _get_pool()
+        conn = pool.getconn()
     except psycopg2.Error as e:
+        _pool_slots.release()
         logging.error(json.dumps({"event": "db_connection_failed", "error": str(e)}))
         raise
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        if not conn.closed:
+            conn.rollback()
+        raise
+    finally:
+        pool.putconn(conn, close=bool(conn.closed))
+        _pool_slots.release()
 
 def create_user(wallet_address, wallet_seed, total_capital, default_indicators=None, default_weights=None):
     try:
@@ -88,16 +130,33 @@ def get_user_by_wallet(wallet_address_or_pub_key):
         logging.error(json.dumps({"event": "get_user_by_wallet_failed", "wallet_address": wallet_address_or_pub_key, "error": str(e)}))
         raise
 
+_session_cache = {}
+_session_cache_lock = threading.Lock()
+
 def get_user_id_from_session(session_id):
+    now = time.monotonic()
+    with _session_cache_lock:
+        cached = _session_cache.get(session_id)
+        if cached and cached[1] > now:
+            return cached[0]
     try:
         with get_db_connection() as conn:
             with conn.cursor() as cur:
                 cur.execute(
-                    "SELECT user_id FROM sessions WHERE session_id = %s AND expires_at > NOW()",
+                    "SELECT user_id, EXTRACT(EPOCH FROM expires_at - NOW()) FROM sessions "
+                    "WHERE session_id = %s AND expires_at > NOW()",
                     (session_id,)
                 )
                 result = cur.fetchone()
-                return result[0] if result else None
+                if not result:
+                    return None
+                # Never cache a session past its own expiry
+                ttl = min(SESSION_CACHE_SECONDS, float(result[1]))
+                with _session_cache_lock:
+                    if len(_session_cache) > 10000:
+                        _session_cache.clear()
+                    _session_cache[session_id] = (result[0], now + ttl)
+                return result[0]
     except Exception as e:
         logging.error(json.dumps({"event": "get_user_id_from_session_failed", "session_id": session_id, "error": str(e)}))
         raise
@@ -141,13 +200,194 @@ def add_trade(user_id, token, direction, entry_time, exit_time, profit, entry_pr
                     "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)",
                     (user_id, token, direction, entry_time, exit_time, profit, entry_price, exit_price, Json(factor_scores))
                 )
+                _apply_trade_stats(cur, [(user_id, exit_time.date(), 1, 1 if profit > 0 else 0, profit)])
                 conn.commit()
                 logging.info(json.dumps({"event": "trade_added", "user_id": user_id, "token": token}))
     except Exception as e:
         logging.error(json.dumps({"event": "add_trade_failed", "user_id": user_id, "error": str(e)}))
         raise
 
+_TRADE_STATS_UPSERT = (
+    "INSERT INTO user_trade_stats_daily (user_id, day, closed_trades, winning_trades, total_profit) VALUES %s "
+    "ON CONFLICT (user_id, day) DO UPDATE SET "
+    "closed_trades = user_trade_stats_daily.closed_trades + EXCLUDED.closed_trades, "
+    "winning_trades = user_trade_stats_daily.winning_trades + EXCLUDED.winning_trades, "
+    "total_profit = user_trade_stats_daily.total_profit + EXCLUDED.total_profit"
+)
+
+def _apply_trade_stats(cur, rows):
+    """Add (user_id, day, closed, wins, profit) increments to the daily and lifetime per-user aggregates."""
+    psycopg2.extras.execute_values(cur, _TRADE_STATS_UPSERT, rows)
+    totals = {}
+    for user_id, _, closed, wins, profit in rows:
+        total = totals.setdefault(user_id, [0, 0, 0])
+        total[0] += closed
+        total[1] += wins
+        total[2] += profit
+    psycopg2.extras.execute_values(
+        cur,
+        "INSERT INTO user_trade_stats (user_id, closed_trades, winning_trades, total_profit) VALUES %s "
+        "ON CONFLICT (user_id) DO UPDATE SET "
+        "closed_trades = user_trade_stats.closed_trades + EXCLUDED.closed_trades, "
+        "winning_trades = user_trade_stats.winning_trades + EXCLUDED.winning_trades, "
+        "total_profit = user_trade_stats.total_profit + EXCLUDED.total_profit, "
+        "updated_at = CURRENT_TIMESTAMP",
+        [(user_id, closed, wins, profit) for user_id, (closed, wins, profit) in totals.items()]
+    )
+
+# Databases created before the aggregates existed only get these tables from ensure_trade_stats_tables();
+# keep them in step with schema.sql
+_TRADE_STATS_TABLES = [
+    "CREATE TABLE IF NOT EXISTS user_trade_stats ("
+    "user_id INT PRIMARY KEY REFERENCES users(user_id), "
+    "closed_trades BIGINT NOT NULL DEFAULT 0, "
+    "winning_trades BIGINT NOT NULL DEFAULT 0, "
+    "total_profit DECIMAL NOT NULL DEFAULT 0, "
+    "updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)",
+    "CREATE TABLE IF NOT EXISTS user_trade_stats_daily ("
+    "user_id INT REFERENCES users(user_id), "
+    "day DATE NOT NULL, "
+    "closed_trades BIGINT NOT NULL DEFAULT 0, "
+    "winning_trades BIGINT NOT NULL DEFAULT 0, "
+    "total_profit DECIMAL NOT NULL DEFAULT 0, "
+    "PRIMARY KEY (user_id, day))",
+    "CREATE TABLE IF NOT EXISTS maintenance_markers ("
+    "name VARCHAR(100) PRIMARY KEY, "
+    "completed_at TIMESTAMP NOT NULL)"
+]
+_TRADE_STATS_BACKFILL_MARKER = "user_trade_stats_backfill"
+
+def ensure_trade_stats_tables():
+    """Create the per-user aggregate tables on a database initialized before they were added; run before any add_trade."""
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                for statement in _TRADE_STATS_TABLES:
+                    cur.execute(statement)
+                conn.commit()
+                logging.info(json.dumps({"event": "trade_stats_tables_ensured"}))
+    except Exception as e:
+        logging.error(json.dumps({"event": "ensure_trade_stats_tables_failed", "error": str(e)}))
+        raise
+
+def get_user_trade_stats(user_id, windows=(7, 30)):
+    """
+    Lifetime and rolling-window P&L aggregates for a user, read from user_trade_stats.
+
+    Cost is one primary-key lookup plus at most max(windows) daily rows, however many trades the user has.
+
+    Returns:
+        dict: closed_trades, winning_trades, total_profit and {"<n>d": {...}} for each window
+    """
+    longest = max(windows)
+    window_columns = ", ".join(
+        f"COALESCE(SUM(d.closed_trades) FILTER (WHERE d.day > CURRENT_DATE - {int(days)}), 0), "
+        f"COALESCE(SUM(d.winning_trades) FILTER (WHERE d.day > CURRENT_DATE - {int(days)}), 0), "
+        f"COALESCE(SUM(d.total_profit) FILTER (WHERE d.day > CURRENT_DATE - {int(days)}), 0)"
+        for days in windows
+    )
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"SELECT s.closed_trades, s.winning_trades, s.total_profit, {window_columns} "
+                    "FROM user_trade_stats s "
+                    "LEFT JOIN user_trade_stats_daily d ON d.user_id = s.user_id AND d.day > CURRENT_DATE - %s "
+                    "WHERE s.user_id = %s "
+                    "GROUP BY s.user_id, s.closed_trades, s.winning_trades, s.total_profit",
+                    (int(longest), user_id)
+                )
+                row = cur.fetchone()
+    except Exception as e:
+        logging.error(json.dumps({"event": "get_user_trade_stats_failed", "user_id": user_id, "error": str(e)}))
+        raise
+    if row is None:
+        row = (0, 0, 0) + (0, 0, 0) * len(windows)
+
+    def summary(closed, wins, profit):
+        return {"closed_trades": int(closed), "winning_trades": int(wins), "total_profit": float(profit)}
+
+    stats = summary(*row[:3])
+    stats["windows"] = {f"{days}d": summary(*row[3 + 3 * i:6 + 3 * i]) for i, days in enumerate(windows)}
+    return stats
+
+def backfill_user_trade_stats():
+    """
+    Rebuild the per-user aggregates from every hot and archived trade.
+
+    Runs in one transaction holding a SHARE lock on trades, so add_trade calls block until it commits and
+    none are counted twice. Archived months are folded in from their Parquet files. The same transaction
+    records a maintenance marker, so user_trade_stats_need_backfill() is False from then on.
+
+    Returns:
+        int: number of trades aggregated
+    """
+    archived = {}
+    for trade in read_archived_trades():
+        key = (trade["user_id"], trade["exit_time"].date())
+        bucket = archived.setdefault(key, [0, 0, 0.0])
+        profit = float(trade["profit"] or 0)
+        bucket[0] += 1
+        bucket[1] += 1 if profit > 0 else 0
+        bucket[2] += profit
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("LOCK TABLE trades IN SHARE MODE")
+                cur.execute("DELETE FROM user_trade_stats_daily")
+                cur.execute("DELETE FROM user_trade_stats")
+                cur.execute(
+                    "SELECT user_id, exit_time::date, COUNT(*), COUNT(*) FILTER (WHERE profit > 0), COALESCE(SUM(profit), 0) "
+                    "FROM trades GROUP BY 1, 2"
+                )
+                rows = [(user_id, day, closed, wins, float(profit)) for user_id, day, closed, wins, profit in cur.fetchall()]
+                rows.extend((user_id, day, closed, wins, profit) for (user_id, day), (closed, wins, profit) in archived.items())
+                # Merge hot and archived rows for the same user and day up front; one upsert batch
+                # cannot touch the same conflict key twice
+                merged = {}
+                for user_id, day, closed, wins, profit in rows:
+                    bucket = merged.setdefault((user_id, day), [0, 0, 0.0])
+                    bucket[0] += closed
+                    bucket[1] += wins
+                    bucket[2] += profit
+                if merged:
+                    _apply_trade_stats(cur, [(user_id, day, *bucket) for (user_id, day), bucket in merged.items()])
+                cur.execute(
+                    "INSERT INTO maintenance_markers (name, completed_at) VALUES (%s, NOW()) "
+                    "ON CONFLICT (name) DO UPDATE SET completed_at = EXCLUDED.completed_at",
+                    (_TRADE_STATS_BACKFILL_MARKER,)
+                )
+            conn.commit()
+        trades = sum(bucket[0] for bucket in merged.values())
+        logging.info(json.dumps({"event": "user_trade_stats_backfilled", "users": len({user_id for user_id, _ in merged}), "trades": trades}))
+        return trades
+    except Exception as e:
+        logging.error(json.dumps({"event": "backfill_user_trade_stats_failed", "error": str(e)}))
+        raise
+
+def user_trade_stats_need_backfill():
+    """
+    True until backfill_user_trade_stats() has completed once.
+
+    Checked against an explicit marker rather than the stats tables being empty: agents started before
+    the check may already have added trades, and their rows alone would hide the missing history.
+    """
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT EXISTS (SELECT 1 FROM maintenance_markers WHERE name = %s)", (_TRADE_STATS_BACKFILL_MARKER,))
+                return not cur.fetchone()[0]
+    except Exception as e:
+        logging.error(json.dumps({"event": "user_trade_stats_need_backfill_failed", "error": str(e)}))
+        raise
+
 def get_all_trades(user_id):
+    """
+    A user's trades still in the hot monthly partitions, newest first.
+
+    Archived months are only served through iter_trades() and the analytics path, so this stays
+    bounded by TRADE_HOT_MONTHS however old the account is.
+    """
     try:
         with get_db_connection() as conn:
             with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cur:
@@ -160,6 +400,112 @@ def get_all_trades(user_id):
         logging.error(json.dumps({"event": "get_all_trades_failed", "user_id": user_id, "error": str(e)}))
         raise
 
+def get_recent_trades(user_id, limit):
+    """A user's newest limit trades, read through the (user_id, exit_time DESC) index."""
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cur:
+                cur.execute(
+                    "SELECT * FROM trades WHERE user_id = %s ORDER BY exit_time DESC LIMIT %s",
+                    (user_id, limit)
+                )
+                return [dict(row) for row in cur.fetchall()]
+    except Exception as e:
+        logging.error(json.dumps({"event": "get_recent_trades_failed", "user_id": user_id, "error": str(e)}))
+        raise
+
+TRADE_EXPORT_COLUMNS = ["trade_id", "user_id", "token", "direction", "entry_time", "exit_time", "profit", "entry_price", "exit_price", "factor_scores"]
+
+def iter_trades(user_id, start=None, end=None, token=None, fetch_size=TRADE_EXPORT_FETCH_SIZE):
+    """
+    Stream a user's trades from a server-side cursor in batches of fetch_size rows.
+
+    Args:
+        user_id (int): Owner of the trades
+        start (datetime): Optional inclusive lower bound on exit_time; timezone-aware values are converted
+        end (datetime): Optional exclusive upper bound on exit_time; timezone-aware values are converted
+        token (str): Optional token filter
+        fetch_size (int): Rows fetched per round trip
+
+    Yields:
+        dict: One trade row keyed by TRADE_EXPORT_COLUMNS
+    """
+    start, end = naive_local(start), naive_local(end)
+    conditions = ["user_id = %s"]
+    params = [user_id]
+    if start:
+        conditions.append("exit_time >= %s")
+        params.append(start)
+    if end:
+        conditions.append("exit_time < %s")
+        params.append(end)
+    if token:
+        conditions.append("token = %s")
+        params.append(token)
+    try:
+        with get_db_connection() as conn:
+            # Named cursors are server-side: rows stay in Postgres until fetched
+            with conn.cursor(name=f"trade_export_{user_id}", cursor_factory=psycopg2.extras.DictCursor) as cur:
+                cur.itersize = fetch_size
+                cur.execute(
+                    f"SELECT {', '.join(TRADE_EXPORT_COLUMNS)} FROM trades WHERE {' AND '.join(conditions)} "
+                    "ORDER BY exit_time DESC",
+                    params
+                )
+                for row in cur:
+                    yield dict(row)
+        yield from read_archived_trades(user_id, start=start, end=end, token=token)
+        logging.info(json.dumps({"event": "trades_exported", "user_id": user_id, "token": token}))
+    except Exception as e:
+        logging.error(json.dumps({"event": "iter_trades_failed", "user_id": user_id, "error": str(e)}))
+        raise
+
+def iter_trade_batches(start=None, end=None, token=None, fetch_size=TRADE_EXPORT_FETCH_SIZE):
+    """
+    Stream closed trades across all users in lists of up to fetch_size rows, hot partitions first.
+
+    Args:
+        start (datetime): Optional inclusive lower bound on exit_time; timezone-aware values are converted
+        end (datetime): Optional exclusive upper bound on exit_time; timezone-aware values are converted
+        token (str): Optional token filter
+        fetch_size (int): Rows per batch
+
+    Yields:
+        list: Trade row dicts
+    """
+    start, end = naive_local(start), naive_local(end)
+    conditions = ["exit_time IS NOT NULL"]
+    params = []
+    if start:
+        conditions.append("exit_time >= %s")
+        params.append(start)
+    if end:
+        conditions.append("exit_time < %s")
+        params.append(end)
+    if token:
+        conditions.append("token = %s")
+        params.append(token)
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor(name="trade_batches", cursor_factory=psycopg2.extras.DictCursor) as cur:
+                cur.execute(
+                    "SELECT token, direction, exit_time, profit, factor_scores FROM trades "
+                    f"WHERE {' AND '.join(conditions)}",
+                    params
+                )
+                yield from _iter_partition_batches(cur, fetch_size)
+        batch = []
+        for row in read_archived_trades(start=start, end=end, token=token):
+            batch.append(row)
+            if len(batch) >= fetch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    except Exception as e:
+        logging.error(json.dumps({"event": "iter_trade_batches_failed", "error": str(e)}))
+        raise
+
 def get_platform_stats():
     try:
         with get_db_connection() as conn:
@@ -190,6 +536,178 @@ def update_platform_stats(indicator, profit, was_correct):
         logging.error(json.dumps({"event": "update_platform_stats_failed", "indicator": indicator, "error": str(e)}))
         raise
 
+def _add_months(year, month, delta):
+    index = year * 12 + (month - 1) + delta
+    return index // 12, index % 12 + 1
+
+def ensure_trade_partitions(months_ahead=TRADE_PARTITION_MONTHS_AHEAD):
+    """
+    Create monthly trades partitions from the current month through months_ahead months out.
+
+    Rows already sitting in trades_default are re-homed first; Postgres refuses to create a partition
+    whose range overlaps them. Months follow clock.now(), the local time exit_time is written in.
+    """
+    move_default_partition_trades()
+    now = clock.now()
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                for delta in range(months_ahead + 1):
+                    year, month = _add_months(now.year, now.month, delta)
+                    next_year, next_month = _add_months(year, month, 1)
+                    cur.execute(
+                        f"CREATE TABLE IF NOT EXISTS trades_{year:04d}_{month:02d} PARTITION OF trades "
+                        "FOR VALUES FROM (%s) TO (%s)",
+                        (datetime(year, month, 1), datetime(next_year, next_month, 1))
+                    )
+                conn.commit()
+                logging.info(json.dumps({"event": "trade_partitions_ensured", "months_ahead": months_ahead}))
+    except Exception as e:
+        logging.error(json.dumps({"event": "ensure_trade_partitions_failed", "error": str(e)}))
+        raise
+
+def list_trade_partitions():
+    """Return (year, month) for every monthly trades partition, oldest first."""
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "SELECT child.relname FROM pg_inherits "
+                    "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                    "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                    "WHERE parent.relname = 'trades'"
+                )
+                partitions = []
+                for (name,) in cur.fetchall():
+                    parts = name.split("_")
+                    if len(parts) == 3 and parts[1].isdigit() and parts[2].isdigit():
+                        partitions.append((int(parts[1]), int(parts[2])))
+                return sorted(partitions)
+    except Exception as e:
+        logging.error(json.dumps({"event": "list_trade_partitions_failed", "error": str(e)}))
+        raise
+
+def _iter_partition_batches(cur, fetch_size):
+    while True:
+        rows = cur.fetchmany(fetch_size)
+        if not rows:
+            return
+        yield [dict(row) for row in rows]
+
+def move_default_partition_trades():
+    """
+    Move trades that landed in trades_default into their monthly partitions.
+
+    Rows only reach the default partition when no monthly partition covered their exit_time, e.g.
+    if ensure_trade_partitions() had not run. Postgres refuses to create a partition whose range
+    overlaps rows in the default partition, so each month's rows are lifted out into a temp table,
+    the partition is created and the rows re-inserted, all in one transaction.
+
+    Returns:
+        list: (year, month) of the partitions rows were moved into
+    """
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT DISTINCT date_trunc('month', exit_time) FROM trades_default")
+                months = sorted((row[0].year, row[0].month) for row in cur.fetchall())
+    except Exception as e:
+        logging.error(json.dumps({"event": "list_default_partition_months_failed", "error": str(e)}))
+        raise
+    for year, month in months:
+        next_year, next_month = _add_months(year, month, 1)
+        bounds = (datetime(year, month, 1), datetime(next_year, next_month, 1))
+        partition = f"trades_{year:04d}_{month:02d}"
+        try:
+            with get_db_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute("CREATE TEMP TABLE trades_moving (LIKE trades) ON COMMIT DROP")
+                    cur.execute(
+                        "WITH moved AS (DELETE FROM trades_default WHERE exit_time >= %s AND exit_time < %s RETURNING *) "
+                        "INSERT INTO trades_moving SELECT * FROM moved",
+                        bounds
+                    )
+                    rows = cur.rowcount
+                    cur.execute(f"CREATE TABLE IF NOT EXISTS {partition} PARTITION OF trades FOR VALUES FROM (%s) TO (%s)", bounds)
+                    cur.execute("INSERT INTO trades SELECT * FROM trades_moving")
+                conn.commit()
+            logging.info(json.dumps({"event": "default_partition_trades_moved", "partition": partition, "rows": rows}))
+        except Exception as e:
+            logging.error(json.dumps({"event": "move_default_partition_trades_failed", "partition": partition, "error": str(e)}))
+            raise
+    return months
+
+def archive_closed_trade_partitions(hot_months=TRADE_HOT_MONTHS, fetch_size=TRADE_EXPORT_FETCH_SIZE):
+    """
+    Move monthly trades partitions older than hot_months into Parquet files and drop them.
+
+    Trades stranded in the default partition are first moved into monthly partitions, so old ones
+    are archived like any other. A partition is only dropped after its archive file has been written
+    and renamed into place. If a previous run crashed between the two, the existing archive is kept
+    when it already holds every row of the partition, and rewritten otherwise.
+
+    Returns:
+        list: (year, month) of the partitions archived
+    """
+    move_default_partition_trades()
+    now = clock.now()
+    cutoff = _add_months(now.year, now.month, -hot_months)
+    archived = []
+    for year, month in list_trade_partitions():
+        if (year, month) >= cutoff:
+            continue
+        partition = f"trades_{year:04d}_{month:02d}"
+        try:
+            with get_db_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute(f"LOCK TABLE {partition} IN SHARE MODE")
+                    cur.execute(f"SELECT COUNT(*) FROM {partition}")
+                    rows = cur.fetchone()[0]
+                if archived_row_count(year, month) != rows:
+                    with conn.cursor(name=f"archive_{partition}", cursor_factory=psycopg2.extras.DictCursor) as cur:
+                        cur.execute(f"SELECT * FROM {partition} ORDER BY user_id, exit_time")
+                        rows = write_archive(year, month, _iter_partition_batches(cur, fetch_size))
+                with conn.cursor() as cur:
+                    cur.execute(f"ALTER TABLE trades DETACH PARTITION {partition}")
+                    cur.execute(f"DROP TABLE {partition}")
+                conn.commit()
+            archived.append((year, month))
+            logging.info(json.dumps({"event": "trade_partition_archived", "partition": partition, "rows": rows}))
+        except Exception as e:
+            logging.error(json.dumps({"event": "archive_trade_partition_failed", "partition": partition, "error": str(e)}))
+            raise
+    return archived
+
+DEFAULT_INDICATORS = ["ict", "elliott", "ema", "rsi", "wyckoff", "tokenomics", "onchain", "ecosystem", "tvl", "social", "whale", "market", "funding"]
+DEFAULT_WEIGHTS = {
+    "ict": 0.25, "elliott": 0.20, "ema": 0.15, "rsi": 0.15, "wyckoff": 0.25,
+    "tokenomics": 0.30, "onchain": 0.25, "ecosystem": 0.25, "tvl": 0.20,
+    "social": 0.20, "whale": 0.30, "market": 0.25, "funding": 0.25
+}
+
+def compute_platform_defaults(stats):
+    """
+    Derive default indicators and weights from per-indicator platform performance.
+
+    Args:
+        stats (dict): {indicator: (avg_profit, accuracy)} for indicators with at least one trade
+
+    Returns:
+        tuple: (indicators, weights)
+    """
+    if not stats:
+        return list(DEFAULT_INDICATORS), dict(DEFAULT_WEIGHTS)
+    sorted_stats = sorted(stats.items(), key=lambda x: x[1][0] * x[1][1], reverse=True)
+    tech_indicators = [ind for ind, _ in sorted_stats if ind in ["ict", "elliott", "ema", "rsi", "wyckoff"]][:5]
+    fund_indicators = [ind for ind, _ in sorted_stats if ind in ["tokenomics", "onchain", "ecosystem", "tvl"]][:4]
+    sent_indicators = [ind for ind, _ in sorted_stats if ind in ["social", "whale", "market", "funding"]][:4]
+    indicators = tech_indicators + fund_indicators + sent_indicators
+    weights = {
+        ind: max(0.1, min(0.5, stats.get(ind, (0, 0))[0] * stats.get(ind, (0, 0))[1] + base))
+        for ind, base in DEFAULT_WEIGHTS.items()
+    }
+    return indicators, weights
+
 def get_platform_defaults():
     try:
         with get_db_connection() as conn:
@@ -199,37 +717,8 @@ def get_platform_defaults():
                     "correct_predictions / total_trades::float AS accuracy "
                     "FROM platform_stats WHERE total_trades > 0"
                 )
-                stats = {row[0]: (row[1], row[2]) for row in cur.fetchall()}
-                if not stats:
-                    return (
-                        ["ict", "elliott", "ema", "rsi", "wyckoff", "tokenomics", "onchain", "ecosystem", "tvl", "social", "whale", "market", "funding"],
-                        {
-                            "ict": 0.25, "elliott": 0.20, "ema": 0.15, "rsi": 0.15, "wyckoff": 0.25,
-                            "tokenomics": 0.30, "onchain": 0.25, "ecosystem": 0.25, "tvl": 0.20,
-                            "social": 0.20, "whale": 0.30, "market": 0.25, "funding": 0.25
-                        }
-                    )
-                sorted_stats = sorted(stats.items(), key=lambda x: x[1][0] * x[1][1], reverse=True)
-                tech_indicators = [ind for ind, _ in sorted_stats if ind in ["ict", "elliott", "ema", "rsi", "wyckoff"]][:5]
-                fund_indicators = [ind for ind, _ in sorted_stats if ind in ["tokenomics", "onchain", "ecosystem", "tvl"]][:4]
-                sent_indicators = [ind for ind, _ in sorted_stats if ind in ["social", "whale", "market", "funding"]][:4]
-                indicators = tech_indicators + fund_indicators + sent_indicators
-                weights = {
-                    "ict": max(0.1, min(0.5, stats.get("ict", (0, 0))[0] * stats.get("ict", (0, 0))[1] + 0.25)),
-                    "elliott": max(0.1, min(0.5, stats.get("elliott", (0, 0))[0] * stats.get("elliott", (0, 0))[1] + 0.20)),
-                    "ema": max(0.1, min(0.5, stats.get("ema", (0, 0))[0] * stats.get("ema", (0, 0))[1] + 0.15)),
-                    "rsi": max(0.1, min(0.5, stats.get("rsi", (0, 0))[0] * stats.get("rsi", (0, 0))[1] + 0.15)),
-                    "wyckoff": max(0.1, min(0.5, stats.get("wyckoff", (0, 0))[0] * stats.get("wyckoff", (0, 0))[1] + 0.25)),
-                    "tokenomics": max(0.1, min(0.5, stats.get("tokenomics", (0, 0))[0] * stats.get("tokenomics", (0, 0))[1] + 0.30)),
-                    "onchain": max(0.1, min(0.5, stats.get("onchain", (0, 0))[0] * stats.get("onchain", (0, 0))[1] + 0.25)),
-                    "ecosystem": max(0.1, min(0.5, stats.get("ecosystem", (0, 0))[0] * stats.get("ecosystem", (0, 0))[1] + 0.25)),
-                    "tvl": max(0.1, min(0.5, stats.get("tvl", (0, 0))[0] * stats.get("tvl", (0, 0))[1] + 0.20)),
-                    "social": max(0.1, min(0.5, stats.get("social", (0, 0))[0] * stats.get("social", (0, 0))[1] + 0.20)),
-                    "whale": max(0.1, min(0.5, stats.get("whale", (0, 0))[0] * stats.get("whale", (0, 0))[1] + 0.30)),
-                    "market": max(0.1, min(0.5, stats.get("market", (0, 0))[0] * stats.get("market", (0, 0))[1] + 0.25)),
-                    "funding": max(0.1, min(0.5, stats.get("funding", (0, 0))[0] * stats.get("funding", (0, 0))[1] + 0.25))
-                }
-                return indicators, weights
+                stats = {row[0]: (float(row[1]), row[2]) for row in cur.fetchall()}
+                return compute_platform_defaults(stats)
     except Exception as e:
         logging.error(json.dumps({"event": "get_platform_defaults_failed", "error": str(e)}))
         raise
@@ -0,0 +1,147 @@
+import threading
+import logging
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from config import FACTOR_ANALYTICS_CACHE_SECONDS, FACTOR_ANALYTICS_CACHE_SIZE, FACTOR_ANALYTICS_DEFAULT_DAYS
+from db import iter_trade_batches, DEFAULT_INDICATORS
+
+logging.basicConfig(filename="cosmos_trading_agent.log", level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+
+_cache = OrderedDict()  # (start, end, token, window) -> (computed_at, results), least recently used first
+_cache_lock = threading.Lock()
+
+def _batch_to_frame(batch, factors):
+    frame = pd.DataFrame.from_records(batch, columns=["token", "direction", "exit_time", "profit", "factor_scores"])
+    scores = pd.DataFrame.from_records(
+        [row or {} for row in frame["factor_scores"]], columns=factors
+    ).astype(np.float32).fillna(0)
+    frame = frame.drop(columns=["factor_scores"]).reset_index(drop=True)
+    frame["profit"] = frame["profit"].astype(np.float64)
+    frame["exit_time"] = pd.to_datetime(frame["exit_time"])
+    return pd.concat([frame, scores], axis=1)
+
+def load_trade_frame(start=None, end=None, token=None, factors=DEFAULT_INDICATORS):
+    """
+    Load closed trades into one columnar frame, expanding factor_scores into a float32 column per factor.
+
+    Trades are pulled in batches so the JSONB rows never all exist as Python dicts at once.
+    """
+    frames = [_batch_to_frame(batch, factors) for batch in iter_trade_batches(start=start, end=end, token=token)]
+    if not frames:
+        return pd.DataFrame(columns=["token", "direction", "exit_time", "profit", *factors])
+    return pd.concat(frames, ignore_index=True)
+
+def _window_start(exit_time, window):
+    if window == "1W":
+        # Weeks are not a fixed frequency, so Series.dt.floor() rejects them; buckets start on Monday
+        return exit_time.dt.to_period("W").dt.start_time
+    return exit_time.dt.floor(window)
+
+def compute_factor_attribution(frame, window="1D", factors=DEFAULT_INDICATORS):
+    """
+    Per-factor hit rate, P&L contribution and score/profit correlation by token and time window.
+
+    A factor "hit" uses the same rule as UserAgent.update_weights: the trade was profitable and the
+    factor's sign agreed with the trade direction. P&L contribution splits each trade's profit across
+    factors by their share of the absolute total score.
+
+    Args:
+        frame (DataFrame): Output of load_trade_frame()
+        window (str): Time bucket: "1h", "4h", "1D" or "1W" (weeks starting Monday)
+
+    Returns:
+        list: One dict per (token, window_start, factor)
+    """
+    if frame.empty:
+        return []
+    scores = frame[factors].to_numpy(dtype=np.float64)
+    profit = frame["profit"].to_numpy(dtype=np.float64)
+    is_long = (frame["direction"] == "long").to_numpy()
+    profitable = profit > 0
+
+    total = scores.sum(axis=1)
+    share = np.abs(scores) / (np.abs(total) + 1e-6)[:, None]
+    hits = profitable[:, None] & ((scores > 0) == is_long[:, None])
+
+    keys = pd.DataFrame({
+        "token": frame["token"].to_numpy(),
+        "window_start": _window_start(frame["exit_time"], window).to_numpy()
+    })
+    columns = {}
+    for i, factor in enumerate(factors):
+        x = scores[:, i]
+        columns[(factor, "hits")] = hits[:, i]
+        columns[(factor, "pnl")] = share[:, i] * profit
+        columns[(factor, "x")] = x
+        columns[(factor, "xx")] = x * x
+        columns[(factor, "xy")] = x * profit
+    parts = pd.DataFrame(columns)
+    parts[("_", "y")] = profit
+    parts[("_", "yy")] = profit * profit
+    parts[("_", "n")] = 1
+    sums = parts.groupby([keys["token"], keys["window_start"]]).sum()
+
+    n = sums[("_", "n")].to_numpy(dtype=np.float64)
+    sy = sums[("_", "y")].to_numpy()
+    syy = sums[("_", "yy")].to_numpy()
+    results = []
+    for factor in factors:
+        sx = sums[(factor, "x")].to_numpy()
+        sxx = sums[(factor, "xx")].to_numpy()
+        sxy = sums[(factor, "xy")].to_numpy()
+        cov = n * sxy - sx * sy
+        var = (n * sxx - sx * sx) * (n * syy - sy * sy)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            corr = np.where(var > 0, cov / np.sqrt(np.maximum(var, 1e-300)), np.nan)
+        hit_rate = sums[(factor, "hits")].to_numpy() / n
+        pnl = sums[(factor, "pnl")].to_numpy()
+        for (token, window_start), trades, hr, contrib, c in zip(sums.index, n, hit_rate, pnl, corr):
+            results.append({
+                "token": token,
+                "window_start": pd.Timestamp(window_start).isoformat(),
+                "factor": factor,
+                "trades": int(trades),
+                "hit_rate": float(hr),
+                "pnl_contribution": float(contrib),
+                "correlation": None if np.isnan(c) else float(c)
+            })
+    return results
+
+def get_factor_attribution(start=None, end=None, token=None, window="1D"):
+    """
+    Cached wrapper around load_trade_frame() + compute_factor_attribution().
+
+    Without a start, the range begins FACTOR_ANALYTICS_DEFAULT_DAYS before end (or today), aligned to
+    midnight so repeated requests share a cache entry instead of loading every trade ever closed.
+    Callers choose the key, so the cache keeps at most FACTOR_ANALYTICS_CACHE_SIZE entries, evicting
+    the least recently used.
+    """
+    if start is None:
+        start = (end or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=FACTOR_ANALYTICS_DEFAULT_DAYS)
+    key = (start, end, token, window)
+    now = time.monotonic()
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached and now - cached[0] < FACTOR_ANALYTICS_CACHE_SECONDS:
+            _cache.move_to_end(key)
+            return cached[1]
+    try:
+        frame = load_trade_frame(start=start, end=end, token=token)
+        results = compute_factor_attribution(frame, window=window)
+    except Exception as e:
+        logging.error(json.dumps({"event": "factor_attribution_failed", "token": token, "window": window, "error": str(e)}))
+        raise
+    with _cache_lock:
+        for stale in [k for k, (ts, _) in _cache.items() if now - ts >= FACTOR_ANALYTICS_CACHE_SECONDS]:
+            del _cache[stale]
+        _cache[key] = (now, results)
+        _cache.move_to_end(key)
+        while len(_cache) > FACTOR_ANALYTICS_CACHE_SIZE:
+            _cache.popitem(last=False)
+    logging.info(json.dumps({"event": "factor_attribution_computed", "token": token, "window": window, "trades": len(frame)}))
+    return results
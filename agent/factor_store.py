@@ -0,0 +1,222 @@
+import os
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from clock import naive_local
+from config import FACTOR_STORE_DIR, FACTOR_STORE_FLUSH_ROWS, FACTOR_STORE_FLUSH_SECONDS
+
+logging.basicConfig(filename="cosmos_trading_agent.log", level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+
+FACTORS = ["ict", "elliott", "ema", "rsi", "wyckoff", "tokenomics", "onchain", "ecosystem", "tvl",
+           "social", "whale", "market", "funding"]
+COLUMNS = ["cycle_time", "user_id", "token"] + FACTORS + ["total_score"]
+
+def _schema():
+    # pyarrow is only imported once scores are flushed or read, not whenever the agent module is imported
+    import pyarrow as pa
+    return pa.schema(
+        [("cycle_time", pa.timestamp("ms")), ("user_id", pa.int32()), ("token", pa.string())]
+        + [(factor, pa.float32()) for factor in FACTORS + ["total_score"]]
+    )
+
+class FactorStore:
+    """
+    Append-only columnar history of every factor_scores vector predict_movement computes.
+
+    One row per (cycle, user, token) with float32 factor columns. Rows are buffered in memory and
+    flushed to zstd-compressed Parquet chunks under one directory per day, sorted by token and time
+    so range reads by token prune row groups through column statistics. compact() merges a finished
+    day's chunks into a single file. Buffered rows not yet flushed are lost on a crash; that is at most
+    FACTOR_STORE_FLUSH_SECONDS of signal history.
+    """
+
+    def __init__(self, directory=FACTOR_STORE_DIR, flush_rows=FACTOR_STORE_FLUSH_ROWS, flush_seconds=FACTOR_STORE_FLUSH_SECONDS):
+        self.directory = directory
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._buffer = {col: [] for col in COLUMNS}
+        self._flusher_started = False
+
+    def record(self, user_id, token, cycle_time, factor_scores):
+        with self._lock:
+            buffer = self._buffer
+            buffer["cycle_time"].append(cycle_time)
+            buffer["user_id"].append(user_id)
+            buffer["token"].append(token)
+            for factor in FACTORS:
+                buffer[factor].append(factor_scores.get(factor, 0.0))
+            buffer["total_score"].append(sum(factor_scores.values()))
+            pending = len(buffer["token"])
+            if not self._flusher_started:
+                self._flusher_started = True
+                threading.Thread(target=self._run_flusher, daemon=True).start()
+        if pending >= self.flush_rows:
+            self.flush()
+
+    def _run_flusher(self):
+        while True:
+            time.sleep(self.flush_seconds)
+            try:
+                self.flush()
+            except Exception as e:
+                logging.error(json.dumps({"event": "factor_store_flush_failed", "error": str(e)}))
+
+    def _take_buffer(self):
+        with self._lock:
+            buffer, self._buffer = self._buffer, {col: [] for col in COLUMNS}
+        return buffer
+
+    def flush(self):
+        """Write buffered rows as one chunk per day touched; return the number of rows written."""
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+        with self._flush_lock:
+            buffer = self._take_buffer()
+            if not buffer["token"]:
+                return 0
+            table = pa.Table.from_pydict(buffer, schema=_schema())
+            days = pc.strftime(table["cycle_time"], format="%Y-%m-%d")
+            written = 0
+            for day in pc.unique(days).to_pylist():
+                chunk = table.filter(pc.equal(days, day)).sort_by([("token", "ascending"), ("cycle_time", "ascending")])
+                directory = os.path.join(self.directory, day)
+                os.makedirs(directory, exist_ok=True)
+                path = os.path.join(directory, f"chunk_{int(time.time() * 1000)}_{os.getpid()}.parquet")
+                pq.write_table(chunk, path + ".tmp", compression="zstd")
+                os.replace(path + ".tmp", path)
+                written += chunk.num_rows
+        logging.info(json.dumps({"event": "factor_scores_flushed", "rows": written}))
+        return written
+
+    def _buffered(self, token, user_id, start, end):
+        import pyarrow as pa
+        with self._lock:
+            buffer = {col: list(values) for col, values in self._buffer.items()}
+        keep = [
+            i for i in range(len(buffer["token"]))
+            if (not token or buffer["token"][i] == token)
+            and (user_id is None or buffer["user_id"][i] == user_id)
+            and (not start or buffer["cycle_time"][i] >= start)
+            and (not end or buffer["cycle_time"][i] < end)
+        ]
+        return pa.Table.from_pydict({col: [values[i] for i in keep] for col, values in buffer.items()}, schema=_schema())
+
+    @staticmethod
+    def _compacted_chunks(directory):
+        """Chunk names already merged into the day file, recorded in its metadata."""
+        path = os.path.join(directory, "day.parquet")
+        if not os.path.exists(path):
+            return set()
+        import pyarrow.parquet as pq
+        metadata = pq.read_schema(path).metadata or {}
+        return set(json.loads(metadata.get(b"chunks", b"[]")))
+
+    def _read_day(self, directory, filters):
+        """
+        Tables for one day directory: the day file plus the chunks it does not already contain.
+
+        The day file's schema and rows come from one open handle, so the chunk list in its metadata
+        always matches the rows read even if compact() swaps in a new version meanwhile. compact() only
+        deletes chunks after that swap, so a chunk that vanishes mid-read means the day file read here
+        is stale, and the caller starts the day over.
+        """
+        import pyarrow.parquet as pq
+        tables = []
+        compacted = set()
+        path = os.path.join(directory, "day.parquet")
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                metadata = pq.read_schema(f).metadata or {}
+                compacted = set(json.loads(metadata.get(b"chunks", b"[]")))
+                f.seek(0)
+                tables.append(pq.read_table(f, filters=filters or None, schema=_schema()))
+        for name in sorted(os.listdir(directory)):
+            if name.startswith("chunk_") and name.endswith(".parquet") and name not in compacted:
+                tables.append(pq.read_table(os.path.join(directory, name), filters=filters or None, schema=_schema()))
+        return tables
+
+    def read(self, token=None, user_id=None, start=None, end=None):
+        """
+        Factor-score rows in [start, end), oldest first, including rows not yet flushed.
+
+        Args:
+            token (str): Restrict to one token
+            user_id (int): Restrict to one user's agent
+            start (datetime): Inclusive lower bound on cycle_time; timezone-aware values are converted
+            end (datetime): Exclusive upper bound on cycle_time; timezone-aware values are converted
+
+        Returns:
+            pyarrow.Table: COLUMNS, sorted by cycle_time
+        """
+        import pyarrow as pa
+        start, end = naive_local(start), naive_local(end)
+        filters = []
+        if token:
+            filters.append(("token", "=", token))
+        if user_id is not None:
+            filters.append(("user_id", "=", user_id))
+        if start:
+            filters.append(("cycle_time", ">=", start))
+        if end:
+            filters.append(("cycle_time", "<", end))
+        tables = []
+        if os.path.isdir(self.directory):
+            for day_name in sorted(os.listdir(self.directory)):
+                try:
+                    day = datetime.strptime(day_name, "%Y-%m-%d")
+                except ValueError:
+                    continue
+                if (start and day + timedelta(days=1) <= start) or (end and day >= end):
+                    continue
+                directory = os.path.join(self.directory, day_name)
+                for _ in range(3):
+                    try:
+                        tables.extend(self._read_day(directory, filters))
+                        break
+                    except FileNotFoundError:
+                        continue  # Compacted mid-read; the new day file holds the vanished chunk's rows
+                else:
+                    raise RuntimeError(f"factor scores for {day_name} kept changing during the read")
+        tables.append(self._buffered(token, user_id, start, end))
+        return pa.concat_tables(tables).sort_by([("cycle_time", "ascending")])
+
+    def compact(self, day):
+        """Merge one finished day's chunks into its day file; return the number of chunks merged."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        directory = os.path.join(self.directory, day.strftime("%Y-%m-%d"))
+        if not os.path.isdir(directory):
+            return 0
+        path = os.path.join(directory, "day.parquet")
+        compacted = self._compacted_chunks(directory)
+        chunks = sorted(name for name in os.listdir(directory)
+                        if name.startswith("chunk_") and name.endswith(".parquet") and name not in compacted)
+        if not chunks:
+            return 0
+        sources = ([path] if os.path.exists(path) else []) + [os.path.join(directory, name) for name in chunks]
+        table = pa.concat_tables([pq.read_table(source, schema=_schema()) for source in sources])
+        table = table.sort_by([("token", "ascending"), ("cycle_time", "ascending")])
+        # The day file lists the chunks it contains, so a crash before they are deleted never double-counts them
+        table = table.replace_schema_metadata({"chunks": json.dumps(sorted(compacted | set(chunks)))})
+        pq.write_table(table, path + ".tmp", compression="zstd")
+        with open(path + ".tmp", "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+        for name in compacted | set(chunks):
+            if os.path.exists(os.path.join(directory, name)):
+                os.remove(os.path.join(directory, name))
+        logging.info(json.dumps({"event": "factor_scores_compacted", "day": directory, "chunks": len(chunks), "rows": table.num_rows}))
+        return len(chunks)
+
+    def compact_previous_days(self, days=2):
+        """Compact the last few finished days; run daily from the maintenance thread."""
+        today = datetime.now().date()
+        return sum(self.compact(today - timedelta(days=offset)) for offset in range(1, days + 1))
+
+factor_store = FactorStore()
@@ -0,0 +1,84 @@
+import threading
+import logging
+import json
+from collections import OrderedDict
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config import X_API_KEY, X_API_SECRET, HTTP_POOL_MAXSIZE, HTTP_CONDITIONAL_CACHE_SIZE
+
+logging.basicConfig(filename="cosmos_trading_agent.log", level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+
+_session = None
+_x_api = None
+_client_lock = threading.Lock()
+# url -> response, for revalidating with If-None-Match / If-Modified-Since
+_conditional_cache = OrderedDict()
+_conditional_lock = threading.Lock()
+
+def get_session():
+    """Process-wide requests.Session with per-host keep-alive connection pools."""
+    global _session
+    if _session is None:
+        with _client_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=32,
+                    pool_maxsize=HTTP_POOL_MAXSIZE,
+                    max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=(502, 503, 504), allowed_methods=("GET",))
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update({"Accept-Encoding": "gzip, deflate", "User-Agent": "cyrus-trading-agent"})
+                _session = session
+    return _session
+
+def http_get(url, headers=None, timeout=10, conditional=True):
+    """
+    GET through the shared session, revalidating previously seen responses.
+
+    When the server sent an ETag or Last-Modified for this URL before, the request is made
+    conditional and a 304 returns the cached response without re-downloading the body.
+
+    Raises:
+        requests.RequestException: On connection errors or non-2xx/304 responses
+    """
+    request_headers = dict(headers or {})
+    cached = None
+    if conditional:
+        with _conditional_lock:
+            cached = _conditional_cache.get(url)
+            if cached is not None:
+                _conditional_cache.move_to_end(url)
+        if cached is not None:
+            if cached.headers.get("ETag"):
+                request_headers["If-None-Match"] = cached.headers["ETag"]
+            if cached.headers.get("Last-Modified"):
+                request_headers["If-Modified-Since"] = cached.headers["Last-Modified"]
+    response = get_session().get(url, headers=request_headers, timeout=timeout)
+    if response.status_code == 304 and cached is not None:
+        return cached
+    response.raise_for_status()
+    if conditional and (response.headers.get("ETag") or response.headers.get("Last-Modified")):
+        response.content  # Read the body now so the cached response outlives the connection
+        with _conditional_lock:
+            _conditional_cache[url] = response
+            _conditional_cache.move_to_end(url)
+            while len(_conditional_cache) > HTTP_CONDITIONAL_CACHE_SIZE:
+                _conditional_cache.popitem(last=False)
+    return response
+
+def get_x_api():
+    """Shared tweepy client; building OAuthHandler/API per call discards its HTTP session."""
+    global _x_api
+    if _x_api is None:
+        with _client_lock:
+            if _x_api is None:
+                import tweepy
+                auth = tweepy.OAuthHandler(X_API_KEY, X_API_SECRET)
+                # Rate budgets are enforced by rate_governor; never park an agent thread for a rate window
+                _x_api = tweepy.API(auth, wait_on_rate_limit=False)
+                logging.info(json.dumps({"event": "x_client_created"}))
+    return _x_api
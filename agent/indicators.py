@@ -0,0 +1,132 @@
+import numpy as np
+
+# Pure-NumPy technical indicator kernels. Every function takes (tokens x candles) arrays, one row per
+# token in time order, and returns one score per token. They reproduce the pandas/ta scoring that
+# UserAgent.get_technical_score used to run per token, so a whole token universe scores in one pass.
+
+TECHNICAL_INDICATORS = ["ict", "elliott", "ema", "rsi", "wyckoff"]
+# The pandas Wyckoff step read rolling(10).mean().iloc[-11], which raised on shorter histories and zeroed
+# every indicator for the token; technical_scores() keeps that fallback when wyckoff is in use.
+WYCKOFF_MIN_CANDLES = 11
+
+def ema(values, window):
+    """EMA along axis 1 matching ta's EMAIndicator (adjust=False, NaN until `window` samples)."""
+    alpha = 2.0 / (window + 1)
+    out = np.empty_like(values, dtype=np.float64)
+    out[:, 0] = values[:, 0]
+    for t in range(1, values.shape[1]):
+        out[:, t] = (1 - alpha) * out[:, t - 1] + alpha * values[:, t]
+    out[:, :window - 1] = np.nan
+    return out
+
+def rsi(close, window=14):
+    """Last RSI value per row, matching ta's RSIIndicator (Wilder smoothing, adjust=False)."""
+    diff = np.diff(close, axis=1, prepend=np.nan)
+    up = np.where(diff > 0, diff, 0.0)
+    down = np.where(diff < 0, -diff, 0.0)
+    alpha = 1.0 / window
+    ema_up = up[:, 0].copy()
+    ema_down = down[:, 0].copy()
+    for t in range(1, close.shape[1]):
+        ema_up = (1 - alpha) * ema_up + alpha * up[:, t]
+        ema_down = (1 - alpha) * ema_down + alpha * down[:, t]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        value = np.where(ema_down == 0, 100.0, 100.0 - 100.0 / (1.0 + ema_up / ema_down))
+    if close.shape[1] < window:
+        value[:] = np.nan
+    return value
+
+def _last_true_index(mask):
+    """Index of the last True per row, -1 where a row has none."""
+    reversed_first = np.argmax(mask[:, ::-1], axis=1)
+    return np.where(mask.any(axis=1), mask.shape[1] - 1 - reversed_first, -1)
+
+def ict_score(high, low, open_, close):
+    rows = np.arange(close.shape[0])
+    current = close[:, -1]
+    daily_high = high.max(axis=1)
+    daily_low = low.min(axis=1)
+    liquidity_above = daily_high * 1.01
+    liquidity_below = daily_low * 0.99
+    rng = high - low
+    order_block = close[rows, _last_true_index(rng == rng.min(axis=1, keepdims=True))]
+    gap = np.full_like(close, np.nan, dtype=np.float64)
+    gap[:, :-1] = open_[:, 1:] - close[:, :-1]
+    with np.errstate(invalid="ignore"):
+        big = np.abs(gap) > rng.mean(axis=1, keepdims=True)
+    count = big.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        fvg = np.where(big, gap, 0.0).sum(axis=1) / count  # NaN when no gap qualifies, as in pandas
+    score = np.where(
+        (current > order_block) & (np.abs(current - liquidity_above) < 0.02 * current), 5,
+        np.where((current < order_block) & (np.abs(current - liquidity_below) < 0.02 * current), -5, 0)
+    )
+    score = score + np.where(
+        (fvg > 0) & (current < daily_high), 3,
+        np.where((fvg < 0) & (current > daily_low), -3, 0)
+    )
+    return score.astype(np.float64)
+
+def elliott_score(high, low, close):
+    rows = np.arange(close.shape[0])
+    current = close[:, -1]
+    peaks = np.zeros_like(high, dtype=bool)
+    troughs = np.zeros_like(low, dtype=bool)
+    peaks[:, 1:-1] = (high[:, :-2] < high[:, 1:-1]) & (high[:, 2:] < high[:, 1:-1])
+    troughs[:, 1:-1] = (low[:, :-2] > low[:, 1:-1]) & (low[:, 2:] > low[:, 1:-1])
+    enough = (peaks.sum(axis=1) >= 3) & (troughs.sum(axis=1) >= 2)
+    last_peak = _last_true_index(peaks)
+    last_trough = _last_true_index(troughs)
+    peak_close = close[rows, last_peak]
+    trough_close = close[rows, last_trough]
+    last_wave = np.where(last_peak > last_trough, peak_close - trough_close, trough_close - peak_close)
+    score = np.where(
+        (last_wave > 0) & (current > peak_close), 3,
+        np.where((last_wave < 0) & (current < trough_close), -3, 0)
+    )
+    return np.where(enough, score, 0).astype(np.float64)
+
+def ema_score(close):
+    short = ema(close, 20)[:, -1]
+    long = ema(close, 50)[:, -1]
+    return np.where(short > long, 2, np.where(short < long, -2, 0)).astype(np.float64)
+
+def rsi_score(close):
+    value = rsi(close, 14)
+    return np.where(value < 30, 2, np.where(value > 70, -2, 0)).astype(np.float64)
+
+def wyckoff_score(close, volume):
+    if close.shape[1] < 20:
+        return np.zeros(close.shape[0])  # pandas' rolling means are still NaN this early
+    volume_trend = volume[:, -10:].mean(axis=1)
+    price_trend = close[:, -10:].mean(axis=1)
+    prev_price_trend = close[:, -20:-10].mean(axis=1)
+    rising_volume = volume_trend > volume.mean(axis=1)
+    score = np.where(
+        rising_volume & (price_trend > prev_price_trend), 3,
+        np.where(rising_volume & (price_trend < prev_price_trend), -3, 0)
+    )
+    return score.astype(np.float64)
+
+def technical_scores(candles, indicators=TECHNICAL_INDICATORS):
+    """
+    Score every token in one vectorized pass.
+
+    Args:
+        candles (ndarray): tokens x candles x 6 array of [timestamp, open, high, low, close, volume]
+        indicators (list): The agent's enabled indicators; only decides the short-history fallback
+
+    Returns:
+        ndarray: tokens x 5 score matrix, columns in TECHNICAL_INDICATORS order
+    """
+    candles = np.asarray(candles, dtype=np.float64)
+    if candles.shape[1] < WYCKOFF_MIN_CANDLES and "wyckoff" in indicators:
+        return np.zeros((candles.shape[0], len(TECHNICAL_INDICATORS)))
+    open_, high, low, close, volume = (candles[:, :, i] for i in range(1, 6))
+    return np.column_stack([
+        ict_score(high, low, open_, close),
+        elliott_score(high, low, close),
+        ema_score(close),
+        rsi_score(close),
+        wyckoff_score(close, volume)
+    ])
@@ -0,0 +1,146 @@
+import threading
+import logging
+import json
+import time
+import hashlib
+from config import PLATFORM_STATS_RECONCILE_SECONDS
+from db import get_platform_stats, update_platform_stats, compute_platform_defaults
+
+logging.basicConfig(filename="cosmos_trading_agent.log", level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+
+class PlatformStatsView:
+    """
+    In-process materialized view of the platform_stats table.
+
+    Updated incrementally by record() whenever a stat is written through this process and
+    reconciled against the database on a background thread, so reads never touch the DB. A reconcile
+    waits for in-flight record() calls and holds off new ones while it reads, so an increment is never
+    both in the DB rows and re-applied on top of them, nor applied and then overwritten by older rows.
+    """
+
+    def __init__(self, reconcile_seconds=PLATFORM_STATS_RECONCILE_SECONDS):
+        self.reconcile_seconds = reconcile_seconds
+        self._lock = threading.Lock()
+        self._writes_done = threading.Condition(self._lock)
+        self._writers = 0
+        self._reconciling = False
+        self._stats = {}
+        self._loaded = False
+        self._reconciler_started = False
+        self._defaults = None
+        self._win_rate = None
+        self._digest = None
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        self.reconcile()
+        with self._lock:
+            if not self._reconciler_started:
+                self._reconciler_started = True
+                threading.Thread(target=self._run_reconciler, daemon=True).start()
+
+    def _run_reconciler(self):
+        while True:
+            time.sleep(self.reconcile_seconds)
+            try:
+                self.reconcile()
+            except Exception:
+                pass  # Already logged; keep serving the last known view
+
+    def _invalidate(self):
+        self._defaults = None
+        self._win_rate = None
+        self._digest = None
+
+    def reconcile(self):
+        with self._writes_done:
+            while self._reconciling:
+                self._writes_done.wait()
+            self._reconciling = True
+            while self._writers:
+                self._writes_done.wait()
+        try:
+            self._reconcile()
+        finally:
+            with self._writes_done:
+                self._reconciling = False
+                self._writes_done.notify_all()
+
+    def _reconcile(self):
+        try:
+            rows = get_platform_stats()
+        except Exception as e:
+            logging.error(json.dumps({"event": "platform_stats_reconcile_failed", "error": str(e)}))
+            raise
+        stats = {
+            indicator: {
+                "total_trades": int(row["total_trades"] or 0),
+                "total_profit": float(row["total_profit"] or 0),
+                "correct_predictions": int(row["correct_predictions"] or 0)
+            }
+            for indicator, row in rows.items()
+        }
+        with self._lock:
+            if stats != self._stats:
+                self._stats = stats
+                self._invalidate()
+            self._loaded = True
+
+    def apply(self, indicator, profit, was_correct):
+        """Apply one update_platform_stats() increment to the in-memory view."""
+        with self._lock:
+            stat = self._stats.setdefault(indicator, {"total_trades": 0, "total_profit": 0.0, "correct_predictions": 0})
+            stat["total_trades"] += 1
+            stat["total_profit"] += float(profit)
+            stat["correct_predictions"] += 1 if was_correct else 0
+            self._invalidate()
+
+    def record(self, indicator, profit, was_correct):
+        """Persist a platform stat increment and mirror it into the view."""
+        with self._writes_done:
+            while self._reconciling:
+                self._writes_done.wait()
+            self._writers += 1
+        try:
+            update_platform_stats(indicator, profit, was_correct)
+            self.apply(indicator, profit, was_correct)
+        finally:
+            with self._writes_done:
+                self._writers -= 1
+                self._writes_done.notify_all()
+
+    def defaults(self):
+        self._ensure_loaded()
+        with self._lock:
+            if self._defaults is None:
+                stats = {
+                    ind: (s["total_profit"] / s["total_trades"], s["correct_predictions"] / s["total_trades"])
+                    for ind, s in self._stats.items() if s["total_trades"] > 0
+                }
+                self._defaults = compute_platform_defaults(stats)
+            indicators, weights = self._defaults
+            return list(indicators), dict(weights)
+
+    def win_rate(self):
+        self._ensure_loaded()
+        with self._lock:
+            if self._win_rate is None:
+                total_trades = sum(s["total_trades"] for s in self._stats.values())
+                correct_predictions = sum(s["correct_predictions"] for s in self._stats.values())
+                self._win_rate = {
+                    "win_rate_absolute": correct_predictions,
+                    "win_rate_percentage": (correct_predictions / total_trades * 100) if total_trades else 0
+                }
+            return dict(self._win_rate)
+
+    def etag(self, resource):
+        self._ensure_loaded()
+        with self._lock:
+            if self._digest is None:
+                # Content-derived so every worker process hands out the same tag for the same stats
+                self._digest = hashlib.sha1(json.dumps(self._stats, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+            return f"{resource}-{self._digest}"
+
+platform_stats_view = PlatformStatsView()
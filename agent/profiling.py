@@ -0,0 +1,203 @@
+import cProfile
+import fcntl
+import threading
+import logging
+import json
+import os
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from config import PROFILE_OUTPUT_DIR, PROFILE_SAMPLE_INTERVAL_MS
+
+logging.basicConfig(filename="cosmos_trading_agent.log", level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+
+MODES = ("sampling", "deterministic")
+
+class ProfilerBusy(Exception):
+    """Raised when arming a deterministic profile while another one is armed or running."""
+
+class StackSampler:
+    """
+    Samples one thread's Python stack on a timer and aggregates collapsed stacks.
+
+    Output is the "frame;frame;frame count" format read by flamegraph.pl, speedscope and inferno.
+    Overhead is bounded by the interval and independent of how much code the target runs.
+    """
+
+    def __init__(self, thread_id, interval_ms=PROFILE_SAMPLE_INTERVAL_MS):
+        self.thread_id = thread_id
+        self.interval = interval_ms / 1000.0
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, path):
+        self._stop.set()
+        self._thread.join()
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+class ProfileRegistry:
+    """
+    Armed profiling requests for agent cycles and API routes.
+
+    Each request profiles the target's next N runs and then disarms itself. Armed requests live in a
+    file under output_dir, guarded by an flock, so every gunicorn worker sees them and N counts runs
+    across all workers. The file only exists while something is armed; when nothing is, the per-run
+    cost is one stat call.
+
+    cProfile hooks the whole interpreter (sys.monitoring on 3.12+), so only one deterministic profile
+    may be armed or running at a time; a run that still finds it busy is sampled instead. Profiler
+    failures are logged and never raised into the profiled code.
+    """
+
+    def __init__(self, output_dir=PROFILE_OUTPUT_DIR):
+        self.output_dir = output_dir
+        self._lock = threading.Lock()
+        self._deterministic = threading.Lock()  # Held while a cProfile profiler is enabled in this process
+
+    @property
+    def armed_path(self):
+        return os.path.join(self.output_dir, "armed.json")
+
+    @contextmanager
+    def _armed_specs(self):
+        """
+        Yield the armed specs as a list of {"kind", "target", "mode", "remaining"} dicts, locked against
+        every process; changes made to the list are written back when the block exits cleanly.
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        with self._lock, open(os.path.join(self.output_dir, "armed.lock"), "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                with open(self.armed_path) as f:
+                    specs = json.load(f)
+            except FileNotFoundError:
+                specs = []
+            before = json.dumps(specs)
+            yield specs
+            if json.dumps(specs) == before:
+                return
+            if not specs:
+                os.remove(self.armed_path)
+                return
+            tmp_path = self.armed_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(specs, f)
+            os.replace(tmp_path, self.armed_path)
+
+    def arm(self, kind, target, runs, mode="sampling"):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {', '.join(MODES)}")
+        if runs < 1:
+            raise ValueError("runs must be at least 1")
+        with self._armed_specs() as specs:
+            others = [spec for spec in specs if (spec["kind"], spec["target"]) != (kind, target)]
+            if mode == "deterministic":
+                if self._deterministic.locked() or any(spec["mode"] == "deterministic" for spec in others):
+                    raise ProfilerBusy("a deterministic profile is already armed or running")
+            specs[:] = others + [{"kind": kind, "target": target, "mode": mode, "remaining": runs}]
+        logging.info(json.dumps({"event": "profiling_armed", "kind": kind, "target": target, "runs": runs, "mode": mode}))
+
+    def disarm(self, kind, target):
+        with self._armed_specs() as specs:
+            remaining = [spec for spec in specs if (spec["kind"], spec["target"]) != (kind, target)]
+            found = len(remaining) < len(specs)
+            specs[:] = remaining
+        return found
+
+    def active(self):
+        """Cheap unlocked check used to skip profiling setup entirely when nothing is armed."""
+        return os.path.exists(self.armed_path)
+
+    def armed(self):
+        if not self.active():
+            return []
+        with self._armed_specs() as specs:
+            return [dict(spec) for spec in specs]
+
+    def outputs(self):
+        if not os.path.isdir(self.output_dir):
+            return []
+        return sorted(name for name in os.listdir(self.output_dir) if name.endswith((".prof", ".collapsed")))
+
+    def _claim(self, kind, target):
+        if not self.active():
+            return None
+        with self._armed_specs() as specs:
+            for spec in specs:
+                if (spec["kind"], spec["target"]) == (kind, target):
+                    spec["remaining"] -= 1
+                    if spec["remaining"] <= 0:
+                        specs.remove(spec)
+                    return spec["mode"]
+        return None
+
+    def _start(self, mode):
+        if mode == "deterministic":
+            profiler = cProfile.Profile()
+            profiler.enable()
+            return profiler
+        sampler = StackSampler(threading.get_ident())
+        sampler.start()
+        return sampler
+
+    def _finish(self, mode, profiler, stem):
+        if mode == "deterministic":
+            profiler.disable()
+            path = stem + ".prof"
+            profiler.dump_stats(path)
+        else:
+            path = stem + ".collapsed"
+            profiler.stop(path)
+        logging.info(json.dumps({"event": "profile_written", "path": path}))
+
+    @contextmanager
+    def profile(self, kind, target):
+        """Profile the enclosed block if (kind, target) is armed; otherwise a no-op."""
+        mode = self._claim(kind, target)
+        if mode is None:
+            yield
+            return
+        if mode == "deterministic" and not self._deterministic.acquire(blocking=False):
+            logging.warning(json.dumps({"event": "profile_downgraded", "kind": kind, "target": target, "reason": "deterministic profiler busy"}))
+            mode = "sampling"
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            stem = os.path.join(self.output_dir, f"{kind}_{target}_{os.getpid()}_{int(time.time() * 1000)}")
+            profiler = self._start(mode)
+        except Exception as e:
+            logging.error(json.dumps({"event": "profile_start_failed", "kind": kind, "target": target, "mode": mode, "error": str(e)}))
+            if mode == "deterministic":
+                self._deterministic.release()
+            yield
+            return
+        try:
+            yield
+        finally:
+            try:
+                self._finish(mode, profiler, stem)
+            except Exception as e:
+                logging.error(json.dumps({"event": "profile_write_failed", "kind": kind, "target": target, "mode": mode, "error": str(e)}))
+            finally:
+                if mode == "deterministic":
+                    self._deterministic.release()
+
+profile_registry = ProfileRegistry()
@@ -0,0 +1,78 @@
+import threading
+import logging
+import json
+import time
+from config import (RATE_LIMIT_X_PER_MIN, RATE_LIMIT_COINTELEGRAPH_PER_MIN, RATE_LIMIT_SECRET_AI_PER_MIN,
+                    RATE_LIMIT_INJECTIVE_PER_MIN, RATE_EXIT_RESERVE, AGENT_CYCLE_SECONDS)
+
+logging.basicConfig(filename="cosmos_trading_agent.log", level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+
+PRIORITY_EXIT = 0   # Managing open positions: may drain the whole bucket
+PRIORITY_ENTRY = 1  # Scouting new entries: must leave the exit reserve untouched
+
+class TokenBucket:
+    def __init__(self, per_minute, capacity=None):
+        self.rate = per_minute / 60.0
+        self.capacity = float(capacity or per_minute)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def try_acquire(self, cost=1.0, floor=0.0):
+        """Take cost tokens if at least floor tokens would remain; never blocks."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens - cost < floor:
+                return False
+            self.tokens -= cost
+            return True
+
+class RateGovernor:
+    """
+    Process-wide admission control for external providers.
+
+    Every agent shares one token bucket per provider. Exit-side work may use the whole bucket, while
+    entry-side work stops once only RATE_EXIT_RESERVE of it is left. Callers that are refused fall back
+    to the last value stored for the same key instead of waiting, so no agent thread ever sleeps on a
+    provider's rate window.
+    """
+
+    def __init__(self, limits, exit_reserve=RATE_EXIT_RESERVE):
+        self.buckets = {provider: TokenBucket(per_minute) for provider, per_minute in limits.items()}
+        self.exit_reserve = exit_reserve
+        self._cache = {}
+        self._cache_lock = threading.Lock()
+
+    def admit(self, provider, priority=PRIORITY_ENTRY, cost=1.0):
+        bucket = self.buckets.get(provider)
+        if bucket is None:
+            return True
+        floor = 0.0 if priority == PRIORITY_EXIT else bucket.capacity * self.exit_reserve
+        admitted = bucket.try_acquire(cost, floor)
+        if not admitted:
+            logging.info(json.dumps({"event": "rate_limited", "provider": provider, "priority": priority}))
+        return admitted
+
+    def store(self, namespace, key, value):
+        with self._cache_lock:
+            self._cache[(namespace, key)] = value
+        return value
+
+    def cached(self, namespace, key, default=None):
+        with self._cache_lock:
+            return self._cache.get((namespace, key), default)
+
+def start_offset(user_id, period=AGENT_CYCLE_SECONDS):
+    """Deterministic per-agent delay that spreads agents evenly across the cycle period."""
+    # Multiplying by the golden-ratio conjugate spreads consecutive ids far apart
+    return ((user_id * 0.6180339887498949) % 1.0) * period
+
+rate_governor = RateGovernor({
+    "x": RATE_LIMIT_X_PER_MIN,
+    "cointelegraph": RATE_LIMIT_COINTELEGRAPH_PER_MIN,
+    "secret_ai": RATE_LIMIT_SECRET_AI_PER_MIN,
+    "injective": RATE_LIMIT_INJECTIVE_PER_MIN
+})
@@ -0,0 +1,94 @@
+import threading
+import logging
+import json
+from config import RISK_MARKET_NET_CAP
+
+logging.basicConfig(filename="cosmos_trading_agent.log", level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+
+class RiskBook:
+    """
+    Fleet-wide exposure per Injective market, maintained incrementally as positions open and close.
+
+    Every update and the concentration check are O(1) under a single lock, so reads never walk agent
+    portfolios. Notional is order quantity times entry price. When net_cap is set, an open that would
+    push a market's absolute net exposure past it is refused; orders that reduce net exposure always pass.
+    """
+
+    def __init__(self, net_cap=RISK_MARKET_NET_CAP):
+        self.net_cap = net_cap
+        self._lock = threading.Lock()
+        self._markets = {}  # market_id -> {"long": notional, "short": notional, "positions": n}
+        self._totals = {"long": 0.0, "short": 0.0, "positions": 0}
+        self._rejections = 0
+
+    def _apply(self, market_id, direction, notional, count):
+        market = self._markets.setdefault(market_id, {"long": 0.0, "short": 0.0, "positions": 0})
+        market[direction] += notional
+        market["positions"] += count
+        self._totals[direction] += notional
+        self._totals["positions"] += count
+        if market["positions"] <= 0:
+            del self._markets[market_id]  # Also discards float residue from the subtractions
+
+    def try_open(self, market_id, direction, notional):
+        """Reserve exposure for a new position; return False if it would breach the market's cap."""
+        signed = notional if direction == "long" else -notional
+        with self._lock:
+            market = self._markets.get(market_id)
+            net = market["long"] - market["short"] if market else 0.0
+            if self.net_cap and abs(net + signed) > self.net_cap and abs(net + signed) > abs(net):
+                self._rejections += 1
+                logging.info(json.dumps({"event": "risk_cap_rejected", "market_id": market_id, "direction": direction,
+                                         "notional": notional, "net": net, "cap": self.net_cap}))
+                return False
+            self._apply(market_id, direction, notional, 1)
+            return True
+
+    def restore(self, market_id, direction, notional):
+        """Count an already-open position, e.g. one resumed on warm restart, without checking caps."""
+        with self._lock:
+            self._apply(market_id, direction, notional, 1)
+
+    def release(self, market_id, direction, notional):
+        """Remove a position's exposure when it closes or its order never went through."""
+        with self._lock:
+            if market_id in self._markets:  # Positions opened before the book existed were never counted
+                self._apply(market_id, direction, -notional, -1)
+
+    def snapshot(self):
+        with self._lock:
+            markets = {
+                market_id: {
+                    "long_notional": m["long"],
+                    "short_notional": m["short"],
+                    "net_notional": m["long"] - m["short"],
+                    "gross_notional": m["long"] + m["short"],
+                    "positions": m["positions"]
+                }
+                for market_id, m in self._markets.items()
+            }
+            totals = {
+                "long_notional": self._totals["long"],
+                "short_notional": self._totals["short"],
+                "net_notional": self._totals["long"] - self._totals["short"],
+                "gross_notional": self._totals["long"] + self._totals["short"],
+                "positions": self._totals["positions"],
+                "cap_rejections": self._rejections
+            }
+        return {"net_cap": self.net_cap, "totals": totals, "markets": markets}
+
+    def metrics(self):
+        """The book in Prometheus text exposition format."""
+        book = self.snapshot()
+        lines = []
+        for name, value in book["totals"].items():
+            lines.append(f"# TYPE risk_{name} {'counter' if name == 'cap_rejections' else 'gauge'}")
+            lines.append(f"risk_{name} {value}")
+        for name in ("long_notional", "short_notional", "net_notional", "positions"):
+            lines.append(f"# TYPE risk_market_{name} gauge")
+            for market_id, market in book["markets"].items():
+                lines.append(f'risk_market_{name}{{market_id="{market_id}"}} {market[name]}')
+        return "\n".join(lines) + "\n"
+
+risk_book = RiskBook()
@@ -17,17 +17,55 @@ CREATE TABLE sessions (
     expires_at TIMESTAMP NOT NULL
 );
 
+-- Range-partitioned by month on exit_time. Monthly partitions are created ahead of time by
+-- db.ensure_trade_partitions(); partitions older than TRADE_HOT_MONTHS are moved to Parquet
+-- by db.archive_closed_trade_partitions().
 CREATE TABLE trades (
-    trade_id SERIAL PRIMARY KEY,
+    trade_id BIGSERIAL,
     user_id INT REFERENCES users(user_id),
     token VARCHAR(20),
     direction VARCHAR(10),
     entry_time TIMESTAMP,
-    exit_time TIMESTAMP,
+    exit_time TIMESTAMP NOT NULL,
     profit DECIMAL,
     entry_price DECIMAL,
     exit_price DECIMAL,
-    factor_scores JSONB
+    factor_scores JSONB,
+    PRIMARY KEY (trade_id, exit_time)
+) PARTITION BY RANGE (exit_time);
+
+-- Catches trades no monthly partition covers; db.move_default_partition_trades() re-homes them.
+CREATE TABLE trades_default PARTITION OF trades DEFAULT;
+
+-- Per-user history reads
+CREATE INDEX trades_user_exit_idx ON trades (user_id, exit_time DESC);
+-- Time-range scans; exit_time is append-ordered so BRIN stays tiny
+CREATE INDEX trades_exit_brin_idx ON trades USING BRIN (exit_time);
+
+-- Per-user P&L aggregates, updated in the same transaction as each trade insert by db.add_trade()
+-- and rebuilt from hot and archived trades by db.backfill_user_trade_stats().
+CREATE TABLE user_trade_stats (
+    user_id INT PRIMARY KEY REFERENCES users(user_id),
+    closed_trades BIGINT NOT NULL DEFAULT 0,
+    winning_trades BIGINT NOT NULL DEFAULT 0,
+    total_profit DECIMAL NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Daily buckets behind the rolling-window figures; a window read touches at most one row per day
+CREATE TABLE user_trade_stats_daily (
+    user_id INT REFERENCES users(user_id),
+    day DATE NOT NULL,
+    closed_trades BIGINT NOT NULL DEFAULT 0,
+    winning_trades BIGINT NOT NULL DEFAULT 0,
+    total_profit DECIMAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, day)
+);
+
+-- One-off maintenance jobs that have completed, e.g. the user_trade_stats backfill
+CREATE TABLE maintenance_markers (
+    name VARCHAR(100) PRIMARY KEY,
+    completed_at TIMESTAMP NOT NULL
 );
 
 CREATE TABLE platform_stats (
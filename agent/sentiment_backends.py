@@ -0,0 +1,142 @@
+import threading
+import logging
+import json
+import queue
+import time
+import asyncio
+import hashlib
+import re
+from collections import OrderedDict
+from concurrent.futures import Future
+from config import SENTIMENT_BATCH_SIZE, SENTIMENT_BATCH_WAIT_MS, SENTIMENT_CACHE_SIZE
+from rate_governor import rate_governor
+import clients
+
+logging.basicConfig(filename="cosmos_trading_agent.log", level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+
+def label_score(labels):
+    """Collapse one text's classifier output into P(positive) - P(negative), in [-1, 1]."""
+    probabilities = {entry["label"].lower(): entry["score"] for entry in labels}
+    return probabilities.get("positive", 0.0) - probabilities.get("negative", 0.0)
+
+_NUMBER = re.compile(r"[-+]?\d+(?:\.\d+)?")
+
+def parse_llm_score(content):
+    """First number in a free-text LLM reply on the -5..5 scale, clamped and normalized to [-1, 1]; None if there is none."""
+    match = _NUMBER.search(content)
+    if not match:
+        return None
+    return max(-5.0, min(5.0, float(match.group()))) / 5
+
+class RemoteLLMBackend:
+    """Scores a whole batch of texts with one prompt to the Secret AI LLM; seconds per call."""
+
+    name = "remote"
+
+    async def score(self, prompt, texts):
+        if not rate_governor.admit("secret_ai"):
+            return None
+        messages = [("system", prompt), ("human", "\n".join(texts))]
+        result = await clients.secret_llm().invoke(messages, stream=False)
+        score = parse_llm_score(result.content)
+        if score is None:
+            logging.warning(json.dumps({"event": "sentiment_llm_unparsable", "reply": result.content[:200]}))
+        return score
+
+class LocalClassifierBackend:
+    """
+    CPU sentiment classifier with dynamic batching and a per-text result cache.
+
+    Texts from every concurrently scored token are queued to one worker thread, which runs the model
+    on up to batch_size texts at a time, waiting at most max_wait_ms for a batch to fill. Scores are
+    cached by text, and the ingestion store keeps feeding the same recent items, so in steady state
+    only newly scraped texts reach the model.
+    """
+
+    name = "local"
+
+    def __init__(self, batch_size=SENTIMENT_BATCH_SIZE, max_wait_ms=SENTIMENT_BATCH_WAIT_MS, cache_size=SENTIMENT_CACHE_SIZE):
+        self.batch_size = batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.cache_size = cache_size
+        self._queue = queue.Queue()
+        self._cache = OrderedDict()  # sha1(text) -> score
+        self._cache_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._started = False
+
+    def _start(self):
+        with self._lock:
+            if not self._started:
+                self._started = True
+                threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            started = time.perf_counter()
+            try:
+                outputs = clients.sentiment_classifier()([text for _, text, _ in batch], batch_size=len(batch))
+            except Exception as e:
+                logging.error(json.dumps({"event": "sentiment_classifier_failed", "batch": len(batch), "error": str(e)}))
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (key, _, future), labels in zip(batch, outputs):
+                score = label_score(labels)
+                self._remember(key, score)
+                future.set_result(score)
+            logging.info(json.dumps({"event": "sentiment_batch", "texts": len(batch), "ms": round((time.perf_counter() - started) * 1000, 2)}))
+
+    def _remember(self, key, score):
+        with self._cache_lock:
+            self._cache[key] = score
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def classify(self, texts):
+        """Futures for per-text scores; cached texts resolve immediately."""
+        self._start()
+        futures = []
+        for text in texts:
+            key = hashlib.sha1(text.encode("utf-8")).hexdigest()
+            with self._cache_lock:
+                score = self._cache.get(key)
+                if score is not None:
+                    self._cache.move_to_end(key)
+            future = Future()
+            if score is not None:
+                future.set_result(score)
+            else:
+                self._queue.put((key, text, future))
+            futures.append(future)
+        return futures
+
+    async def score(self, prompt, texts):
+        if not texts:
+            return 0.0
+        scores = await asyncio.gather(*(asyncio.wrap_future(future) for future in self.classify(texts)))
+        return sum(scores) / len(scores)
+
+BACKENDS = {"local": LocalClassifierBackend, "remote": RemoteLLMBackend}
+_instances = {}
+_instances_lock = threading.Lock()
+
+def get_backend(name):
+    if name not in BACKENDS:
+        raise ValueError(f"sentiment backend must be one of {', '.join(BACKENDS)}")
+    with _instances_lock:
+        if name not in _instances:
+            _instances[name] = BACKENDS[name]()
+        return _instances[name]
@@ -0,0 +1,198 @@
+import threading
+import logging
+import json
+import time
+import asyncio
+from bisect import bisect_left
+from config import (SENTIMENT_INGEST_SECONDS, SENTIMENT_RETENTION_HOURS, SENTIMENT_BACKEND_WEB, SENTIMENT_BACKEND_X,
+                    SENTIMENT_ESCALATION_THRESHOLD)
+from http_client import http_get, get_x_api
+from rate_governor import rate_governor
+from sentiment_backends import get_backend
+
+logging.basicConfig(filename="cosmos_trading_agent.log", level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+
+class SentimentStore:
+    """
+    Shared, time-indexed store of scraped items and scored sentiment, keyed by (source, token).
+
+    Items are deduplicated by their source ID across ingestion runs and expire after
+    SENTIMENT_RETENTION_HOURS.
+    """
+
+    def __init__(self, retention_seconds=SENTIMENT_RETENTION_HOURS * 3600):
+        self.retention_seconds = retention_seconds
+        self._lock = threading.Lock()
+        self._items = {}   # (source, token) -> [(ingested_at, item_id, text)], ingestion order
+        self._seen = {}    # (source, token) -> {item_id: ingested_at}
+        self._scores = {}  # (source, token) -> (scored_at, score)
+
+    def add(self, source, token, items, now=None):
+        """Append (item_id, text) pairs not seen before; return the new ones."""
+        now = time.time() if now is None else now
+        key = (source, token)
+        with self._lock:
+            seen = self._seen.setdefault(key, {})
+            bucket = self._items.setdefault(key, [])
+            self._expire(key, now)
+            new_items = []
+            for item_id, text in items:
+                if item_id not in seen:
+                    seen[item_id] = now
+                    bucket.append((now, item_id, text))
+                    new_items.append((item_id, text))
+        return new_items
+
+    def _expire(self, key, now):
+        cutoff = now - self.retention_seconds
+        bucket = self._items[key]
+        drop = bisect_left(bucket, (cutoff,))
+        if drop:
+            for _, item_id, _ in bucket[:drop]:
+                self._seen[key].pop(item_id, None)
+            del bucket[:drop]
+
+    def recent(self, source, token, since=None, limit=None):
+        """Texts ingested at or after since, newest first."""
+        with self._lock:
+            bucket = self._items.get((source, token), [])
+            start = bisect_left(bucket, (since,)) if since else 0
+            texts = [text for _, _, text in reversed(bucket[start:])]
+        return texts[:limit] if limit else texts
+
+    def set_score(self, source, token, score, now=None):
+        with self._lock:
+            self._scores[(source, token)] = (time.time() if now is None else now, score)
+
+    def score(self, source, token, default=0):
+        with self._lock:
+            entry = self._scores.get((source, token))
+        return entry[1] if entry else default
+
+def fetch_web_items(token):
+    from bs4 import BeautifulSoup
+    response = http_get(f"https://cointelegraph.com/search?query={token}", timeout=10)
+    soup = BeautifulSoup(response.text, "html.parser")
+    items = []
+    for h2 in soup.find_all("h2", class_="article-title")[:5]:
+        link = h2.find_parent("a") or h2.find("a")
+        items.append((link.get("href") if link and link.get("href") else h2.text.strip(), h2.text))
+    return items
+
+def fetch_x_items(token):
+    tweets = get_x_api().search_tweets(q=token, count=100, lang="en", tweet_mode="extended")
+    return [(t.id_str, t.full_text) for t in tweets]
+
+SOURCES = {
+    "web": {
+        "provider": "cointelegraph",
+        "fetch": fetch_web_items,
+        "prompt": "Analyze sentiment of these article titles. Score -5 (negative) to 5 (positive).",
+        "limit": 5,
+        "backend": SENTIMENT_BACKEND_WEB  # Scores the "market" factor
+    },
+    "x": {
+        "provider": "x",
+        "fetch": fetch_x_items,
+        "prompt": "Analyze sentiment of these X posts. Score -5 (negative) to 5 (positive).",
+        "limit": 100,
+        "backend": SENTIMENT_BACKEND_X  # Scores the "social" factor
+    }
+}
+
+class SentimentIngestor:
+    """
+    Background stage that scrapes each tracked token once per interval for every source.
+
+    Agents register their token lists with track(); the scraped items land in the shared
+    SentimentStore and are scored once per token, so scraping cost scales with tokens, not users.
+    Each run visits the least recently fetched (source, token) pairs first, so when a provider's
+    rate limit runs out partway through, the next run picks up where this one stopped.
+    """
+
+    def __init__(self, store, interval=SENTIMENT_INGEST_SECONDS):
+        self.store = store
+        self.interval = interval
+        self._tokens = set()
+        self._unscored = set()  # (source, token) with items newer than the stored score
+        self._fetched_at = {}   # (source, token) -> time of the last admitted fetch
+        self._lock = threading.Lock()
+        self._started = False
+
+    def track(self, tokens):
+        with self._lock:
+            self._tokens.update(tokens)
+            if not self._started:
+                self._started = True
+                threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        while True:
+            started = time.time()
+            with self._lock:
+                tokens = sorted(self._tokens)
+            loop.run_until_complete(self.ingest_all(tokens))
+            logging.info(json.dumps({"event": "sentiment_ingest_cycle", "tokens": len(tokens), "seconds": time.time() - started}))
+            time.sleep(max(0, self.interval - (time.time() - started)))
+
+    async def ingest_all(self, tokens):
+        """
+        Ingest every source for tokens concurrently, so local scoring batches texts across tokens.
+
+        Fetches run on the default executor's threads; pairs are admitted by the rate governor in order,
+        least recently fetched first, before any of them starts fetching.
+        """
+        pairs = sorted(((source, token) for token in tokens for source in SOURCES),
+                       key=lambda pair: self._fetched_at.get(pair, 0))
+        await asyncio.gather(*(self.ingest(source, token) for source, token in pairs))
+
+    async def ingest(self, source, token):
+        spec = SOURCES[source]
+        if not rate_governor.admit(spec["provider"]):
+            return
+        self._fetched_at[(source, token)] = time.time()
+        try:
+            items = await asyncio.to_thread(spec["fetch"], token)  # Blocking HTTP; keeps the other pairs moving
+            new_items = self.store.add(source, token, items)
+            if new_items:
+                self._unscored.add((source, token))
+            if (source, token) not in self._unscored:
+                return  # Nothing new since the last score; it still stands
+            texts = self.store.recent(source, token, limit=spec["limit"])
+            score = await score_texts(source, texts)
+            if score is None:
+                return  # Remote scoring not admitted or unparsable this round; stays unscored and is retried next run
+            self.store.set_score(source, token, score)
+            self._unscored.discard((source, token))
+            logging.info(json.dumps({"event": "sentiment_ingested", "source": source, "token": token, "new_items": len(new_items), "score": score}))
+        except Exception as e:
+            logging.error(json.dumps({"event": "sentiment_ingest_failed", "source": source, "token": token, "error": str(e)}))
+
+async def score_texts(source, texts):
+    """
+    Score texts with the source's configured backend, normalized to [-1, 1].
+
+    A local score closer to neutral than SENTIMENT_ESCALATION_THRESHOLD is ambiguous, so it is escalated
+    to the remote LLM when Secret AI admits the call; otherwise the local score stands.
+
+    Returns:
+        float: Score, or None when the remote backend was not admitted by the rate governor or gave no number
+    """
+    spec = SOURCES[source]
+    score = await get_backend(spec["backend"]).score(spec["prompt"], texts)
+    if spec["backend"] == "local" and abs(score) < SENTIMENT_ESCALATION_THRESHOLD:
+        try:
+            remote_score = await get_backend("remote").score(spec["prompt"], texts)
+        except Exception as e:
+            logging.error(json.dumps({"event": "sentiment_escalation_failed", "source": source, "error": str(e)}))
+            remote_score = None
+        if remote_score is not None:
+            logging.info(json.dumps({"event": "sentiment_escalated", "source": source, "local_score": score, "score": remote_score}))
+            score = remote_score
+    return score
+
+sentiment_store = SentimentStore()
+sentiment_ingestor = SentimentIngestor(sentiment_store)
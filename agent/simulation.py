@@ -0,0 +1,432 @@
+"""
+Offline load-test harness for the agent fleet.
+
+Replaces the Injective client, Cosmos RPC, Secret AI, X and every scrape target with in-process
+stand-ins that have configurable latency and failure rates, drives manage_trades() cycles from a
+virtual clock, and reports cycle latency, throughput and resource usage. Only a local Postgres is
+needed; nothing touches the network.
+
+Agents write simulated capital, trades and P&L aggregates, so the harness runs against a throwaway
+database named with --database (created from schema.sql) and refuses one that holds real users.
+
+    python simulation.py --database cosmos_trading_sim --seed-users 1000 --hours 24 --workers 64 --latency-ms 20 --failure-rate 0.01
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import resource
+import statistics
+import tempfile
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from types import SimpleNamespace
+import requests
+from bech32 import bech32_encode, convertbits
+import psycopg2
+from psycopg2.extras import Json, execute_values
+import db
+from clock import clock, VirtualClock
+from config import AGENT_CYCLE_SECONDS
+from db import get_db_connection, load_users, DEFAULT_INDICATORS, DEFAULT_WEIGHTS
+
+# Stored in place of a bcrypt hash so simulated users can be told apart from real ones, whose
+# wallet_seed always holds a hash
+SIM_WALLET_SEED = b"simulated"
+
+SIM_SYMBOLS = ["ATOM", "OSMO", "INJ", "TIA", "JUNO", "AKT", "SCRT", "STARS", "KAVA", "EVMOS", "STRD", "DYDX"]
+
+class FaultInjector:
+    """Adds latency and random failures to every simulated remote call, and counts them."""
+
+    def __init__(self, latency_ms, failure_rate, seed=None):
+        self.latency = latency_ms / 1000.0
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.calls = Counter()
+        self.failures = Counter()
+        self.lock = threading.Lock()
+
+    def _draw(self, name):
+        with self.lock:
+            self.calls[name] += 1
+            delay = self.rng.expovariate(1 / self.latency) if self.latency else 0
+            failed = self.rng.random() < self.failure_rate
+            if failed:
+                self.failures[name] += 1
+        return delay, failed
+
+    def call(self, name):
+        delay, failed = self._draw(name)
+        if delay:
+            time.sleep(delay)
+        if failed:
+            raise requests.ConnectionError(f"simulated {name} failure")
+
+    async def acall(self, name):
+        delay, failed = self._draw(name)
+        if delay:
+            await asyncio.sleep(delay)
+        if failed:
+            raise requests.ConnectionError(f"simulated {name} failure")
+
+class SimulatedExchange:
+    """Stand-in for the Injective client: random-walk markets advanced by the virtual clock."""
+
+    def __init__(self, faults, symbols=SIM_SYMBOLS, seed=None, history=200):
+        self.faults = faults
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.markets = [
+            SimpleNamespace(ticker=f"{symbol}/USDT PERP", market_id="0x" + f"{i + 1:064x}")
+            for i, symbol in enumerate(symbols)
+        ]
+        self.candles = {m.market_id: deque(maxlen=history) for m in self.markets}
+        self.prices = {m.market_id: self.rng.uniform(1, 50) for m in self.markets}
+        self.orders = Counter()
+        start = clock.now().timestamp() - history * 3600
+        for i in range(history):
+            self.step(start + i * 3600)
+
+    def step(self, timestamp):
+        """Close one hourly candle per market at timestamp."""
+        with self.lock:
+            for market_id, price in self.prices.items():
+                path = [price]
+                for _ in range(4):
+                    path.append(path[-1] * (1 + self.rng.gauss(0, 0.004)))
+                self.prices[market_id] = path[-1]
+                self.candles[market_id].append(SimpleNamespace(
+                    timestamp=timestamp, open=path[0], high=max(path), low=min(path), close=path[-1],
+                    volume=self.rng.uniform(1e4, 1e6)
+                ))
+
+    def get_derivative_markets(self):
+        self.faults.call("injective.markets")
+        return SimpleNamespace(markets=list(self.markets))
+
+    def get_historical_derivative_candles(self, market_id, interval="1h", limit=50):
+        self.faults.call("injective.candles")
+        with self.lock:
+            return SimpleNamespace(candles=list(self.candles[market_id])[-limit:])
+
+    def get_derivative_ticker(self, market_id):
+        self.faults.call("injective.ticker")
+        with self.lock:
+            return SimpleNamespace(ticker=SimpleNamespace(price=str(self.prices[market_id])))
+
+    def get_derivative_tx_history(self, market_id, limit=50):
+        self.faults.call("injective.tx_history")
+        return SimpleNamespace(transactions=[
+            SimpleNamespace(quantity=str(self.rng.uniform(1, 1e4)), price=str(self.prices[market_id]),
+                            receiver=self.rng.choice(["inj1wallet", "inj1exchange"]))
+            for _ in range(limit)
+        ])
+
+    def get_staking_validators(self):
+        self.faults.call("injective.validators")
+        return SimpleNamespace(validators=[{"commission": {"commission_rates": {"rate": "0.05"}}}] * 10)
+
+    def get_bank_balance(self, address, denom):
+        self.faults.call("injective.balance")
+        return SimpleNamespace(amount=str(int(self.rng.uniform(0, 1e24))))
+
+    def create_derivative_order(self, order, private_key):
+        self.faults.call("injective.create_order")
+        with self.lock:
+            self.orders["created"] += 1
+        return {"orderHash": "0x" + os.urandom(32).hex()}
+
+    def cancel_derivative_order(self, market_id, subaccount_id, order_hash):
+        self.faults.call("injective.cancel_order")
+        with self.lock:
+            self.orders["cancelled"] += 1
+
+class SimulatedComposer:
+    def MarketOrder(self, **kwargs):
+        return kwargs
+
+class SimulatedCosmos:
+    def __init__(self, faults, capital=1000):
+        self.faults = faults
+        self.capital = capital
+
+    def get_bank_balances(self, wallet_address):
+        self.faults.call("cosmos.balances")
+        return {"balances": [{"denom": "uatom", "amount": str(int(self.capital * 10**6))}]}
+
+    def get_account(self, wallet_address):
+        self.faults.call("cosmos.account")
+        return {"account_number": 1, "sequence": 0}
+
+    def get_latest_block(self):
+        self.faults.call("cosmos.block")
+        return {"block": {"header": {"height": 1}}}
+
+class SimulatedTransaction:
+    faults = None
+
+    def __init__(self, **kwargs):
+        self.msgs = []
+
+    def add_msg(self, **kwargs):
+        self.msgs.append(kwargs)
+
+    def sign_and_broadcast(self):
+        self.faults.call("cosmos.broadcast")
+
+class SimulatedLLM:
+    def __init__(self, faults, seed=None):
+        self.faults = faults
+        self.rng = random.Random(seed)
+
+    async def invoke(self, messages, stream=False):
+        await self.faults.acall("secret_ai.invoke")
+        return SimpleNamespace(content=f"{self.rng.uniform(-5, 5):.2f}")
+
+class SimulatedClassifier:
+    """Stand-in for the local transformers pipeline: a deterministic label distribution per text."""
+
+    def __init__(self, faults):
+        self.faults = faults
+
+    def __call__(self, texts, batch_size=None):
+        self.faults.call("sentiment.classify")
+        outputs = []
+        for text in texts:
+            rng = random.Random(text)
+            positive = rng.random()
+            negative = rng.random() * (1 - positive)
+            outputs.append([{"label": "positive", "score": positive}, {"label": "negative", "score": negative},
+                            {"label": "neutral", "score": 1 - positive - negative}])
+        return outputs
+
+class SimulatedX:
+    def __init__(self, faults):
+        self.faults = faults
+        self.next_id = 0
+        self.lock = threading.Lock()
+
+    def search_tweets(self, q, count=100, **kwargs):
+        self.faults.call("x.search")
+        with self.lock:
+            start, self.next_id = self.next_id, self.next_id + 10
+        return [SimpleNamespace(id_str=str(i), full_text=f"{q} post {i}") for i in range(start, start + min(count, 10))]
+
+class SimulatedWeb:
+    """Stand-in for http_client.http_get covering the token sources and Cointelegraph."""
+
+    def __init__(self, faults, symbols=SIM_SYMBOLS):
+        self.faults = faults
+        self.symbols = symbols
+
+    def __call__(self, url, headers=None, timeout=10, conditional=True):
+        self.faults.call("http." + url.split("/")[2])
+        if "chain-registry" in url:
+            body = [{"chain_id": "cosmoshub-4", "chain_name": "cosmoshub"}]
+        elif "dexscreener" in url:
+            body = {"pairs": [{"baseToken": {"symbol": s}, "chainId": "cosmos"} for s in self.symbols]}
+        elif "coingecko" in url:
+            body = [{"symbol": s.lower()} for s in self.symbols]
+        else:
+            hour = int(clock.now().timestamp() // 3600)
+            html = "".join(f'<a href="/news/{hour}-{i}"><h2 class="article-title">Headline {hour}-{i}</h2></a>' for i in range(5))
+            return SimpleNamespace(text=html, status_code=200, json=lambda: None)
+        return SimpleNamespace(text=json.dumps(body), status_code=200, json=lambda: body)
+
+def install(faults, exchange, seed=None, rate_limits=True):
+    """Swap every remote dependency of the trading stack for its simulated stand-in."""
+    import clients
+    import token_fetcher
+    import sentiment_ingest
+    from token_universe import TokenUniverse
+    from rate_governor import rate_governor
+    from agent_state import agent_state_store
+    from factor_store import factor_store
+
+    web = SimulatedWeb(faults)
+    x_api = SimulatedX(faults)
+    SimulatedTransaction.faults = faults
+    clients.override(
+        injective_client=exchange,
+        injective_composer=SimulatedComposer(),
+        cosmos_client=SimulatedCosmos(faults),
+        cosmos_transaction_class=SimulatedTransaction,
+        secret_llm=SimulatedLLM(faults, seed),
+        sentiment_classifier=SimulatedClassifier(faults),
+        token_universe=TokenUniverse(exchange)
+    )
+    token_fetcher.http_get = web
+    sentiment_ingest.http_get = web
+    sentiment_ingest.get_x_api = lambda: x_api
+    # The harness drives ingestion once per virtual cycle instead of the real-time background thread
+    sentiment_ingest.sentiment_ingestor._started = True
+    # Simulated positions must never be restored into, or overwrite, a real deployment's state
+    agent_state_store.state_dir = tempfile.mkdtemp(prefix="sim_agent_state_")
+    factor_store.directory = tempfile.mkdtemp(prefix="sim_factor_scores_")
+    if not rate_limits:
+        rate_governor.buckets = {}
+
+def seed_users(count, capital=1000):
+    """
+    Bulk-insert count synthetic users with valid bech32 addresses into the local database.
+
+    Returns:
+        list: user_ids of the inserted users
+    """
+    rows = []
+    for _ in range(count):
+        address = bech32_encode("cosmos", convertbits(os.urandom(20), 8, 5))
+        rows.append((address, psycopg2.Binary(SIM_WALLET_SEED), capital, Json(DEFAULT_INDICATORS), Json(DEFAULT_WEIGHTS), capital * 0.5, datetime.now()))
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            user_ids = [row[0] for row in execute_values(
+                cur,
+                "INSERT INTO users (wallet_address, wallet_seed, total_capital, indicators, weights, bridged_capital, created_at) "
+                "VALUES %s RETURNING user_id",
+                rows, fetch=True
+            )]
+        conn.commit()
+    return user_ids
+
+def simulated_user_ids():
+    """
+    user_ids of the users seed_users() inserted on earlier runs.
+
+    Raises:
+        SystemExit: if the database also holds real users, whose capital and trade history agents would overwrite
+    """
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT user_id, wallet_seed = %s FROM users ORDER BY user_id", (psycopg2.Binary(SIM_WALLET_SEED),))
+            rows = cur.fetchall()
+    real = sum(1 for _, simulated in rows if not simulated)
+    if real:
+        raise SystemExit(f"Refusing to simulate against database {db.DB_NAME!r}: it holds {real} non-simulated users. "
+                         "Point --database at a throwaway database.")
+    return [user_id for user_id, _ in rows]
+
+def boot_agents(users, workers):
+    from trading_agent import UserAgent
+
+    def boot(item):
+        user_id, data = item
+        # Booted paused so construction neither bridges nor starts a scheduler thread; the harness drives cycles
+        agent = UserAgent(
+            user_id=user_id, wallet_address=data["wallet_address"], wallet_seed="simulated",
+            total_capital=float(data["total_capital"]), paused=True, indicators=data["indicators"],
+            weights=data["weights"], bridged_capital=float(data["bridged_capital"] or 0),
+            active_capital=float(data["active_capital"] or 0)
+        )
+        agent.paused = False
+        return agent
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(boot, users.items()))
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def run(hours, workers, virtual_clock, exchange, agents):
+    from sentiment_ingest import sentiment_ingestor
+
+    latencies = []
+    errors = Counter()
+
+    def cycle(agent):
+        t0 = time.perf_counter()
+        try:
+            agent.manage_trades()
+            error = None
+        except Exception as e:
+            error = type(e).__name__
+        return time.perf_counter() - t0, error
+
+    loop = asyncio.new_event_loop()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for _ in range(hours):
+            virtual_clock.advance(AGENT_CYCLE_SECONDS)
+            exchange.step(virtual_clock.now().timestamp())
+            with sentiment_ingestor._lock:
+                tokens = sorted(sentiment_ingestor._tokens)
+            loop.run_until_complete(sentiment_ingestor.ingest_all(tokens))
+            for latency, error in pool.map(cycle, agents):
+                latencies.append(latency)
+                if error:
+                    errors[error] += 1
+    loop.close()
+    wall = time.perf_counter() - started
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return {
+        "agents": len(agents),
+        "virtual_hours": hours,
+        "cycles": len(latencies),
+        "wall_seconds": round(wall, 3),
+        "cycles_per_second": round(len(latencies) / wall, 2) if wall else 0,
+        "speedup_vs_real_time": round(hours * AGENT_CYCLE_SECONDS / wall, 1) if wall else 0,
+        "cycle_latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 2),
+            "p95": round(percentile(latencies, 95) * 1000, 2),
+            "p99": round(percentile(latencies, 99) * 1000, 2),
+            "max": round(max(latencies, default=0) * 1000, 2),
+            "mean": round(statistics.fmean(latencies) * 1000, 2) if latencies else 0
+        },
+        "cycle_errors": dict(errors),
+        "orders": dict(exchange.orders),
+        "open_positions": sum(len(a.portfolio) for a in agents),
+        "max_rss_mb": round(usage.ru_maxrss / 1024, 1),
+        "cpu_user_seconds": round(usage.ru_utime, 2),
+        "cpu_system_seconds": round(usage.ru_stime, 2),
+        "threads": threading.active_count()
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulated load test for the trading agent fleet")
+    parser.add_argument("--database", required=True, help="throwaway Postgres database to run against, instead of DB_NAME")
+    parser.add_argument("--seed-users", type=int, default=0, help="insert this many synthetic users before booting")
+    parser.add_argument("--max-users", type=int, default=None, help="boot at most this many simulated users")
+    parser.add_argument("--hours", type=int, default=24, help="virtual hours (agent cycles) to simulate")
+    parser.add_argument("--workers", type=int, default=32, help="threads running agent cycles concurrently")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="mean latency of each simulated remote call")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="probability a simulated remote call fails")
+    parser.add_argument("--no-rate-limits", action="store_true", help="disable the provider rate governor")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for prices, latency and failures")
+    parser.add_argument("--log-level", default="WARNING", help="agent log level during the run")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(args.log_level)
+    db.DB_NAME = args.database  # Read when the pool is first created
+    virtual_clock = VirtualClock(datetime(2025, 1, 1))
+    clock.use(virtual_clock)
+    faults = FaultInjector(args.latency_ms, args.failure_rate, args.seed)
+    exchange = SimulatedExchange(faults, seed=args.seed)
+    install(faults, exchange, seed=args.seed, rate_limits=not args.no_rate_limits)
+
+    user_ids = simulated_user_ids()  # Checked before seeding so a real database is never written to
+    if args.seed_users:
+        user_ids = seed_users(args.seed_users)
+    if args.max_users:
+        user_ids = user_ids[:args.max_users]
+    users = load_users()
+    users = {user_id: users[user_id] for user_id in user_ids if user_id in users}
+    boot_started = time.perf_counter()
+    agents = boot_agents(users, args.workers)
+    boot_seconds = time.perf_counter() - boot_started
+
+    report = run(args.hours, args.workers, virtual_clock, exchange, agents)
+    report["boot_seconds"] = round(boot_seconds, 3)
+    report["remote_calls"] = dict(faults.calls)
+    report["remote_failures"] = dict(faults.failures)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
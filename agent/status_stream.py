@@ -0,0 +1,114 @@
+import threading
+import json
+import time
+from collections import deque
+from datetime import datetime
+from config import (STATUS_STREAM_BACKLOG, STATUS_STREAM_HEARTBEAT_SECONDS, STATUS_STREAM_MAX_SECONDS,
+                    STATUS_STREAM_MAX_CONNECTIONS)
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def status_diff(previous, current):
+    """Fields of a status_snapshot() that changed, with the portfolio split into opened and closed positions."""
+    diff = {}
+    for key, value in current.items():
+        if key == "portfolio":
+            continue
+        if previous.get(key) != value:
+            diff[key] = value
+    old_portfolio = previous.get("portfolio", {})
+    new_portfolio = current.get("portfolio", {})
+    opened = {token: data for token, data in new_portfolio.items() if old_portfolio.get(token) != data}
+    closed = [token for token in old_portfolio if token not in new_portfolio]
+    if opened:
+        diff["positions_opened"] = opened
+    if closed:
+        diff["positions_closed"] = closed
+    return diff
+
+class _Channel:
+    def __init__(self, lock):
+        self.cond = threading.Condition(lock)  # Shares the hub lock; notifies only this user's streams
+        self.state = None
+        self.seq = 0
+        self.events = deque(maxlen=STATUS_STREAM_BACKLOG)  # (seq, payload)
+
+class StatusHub:
+    """
+    Per-user status channels for the server-sent events stream.
+
+    Agents publish a status snapshot when a cycle ends or a user action changes state. The hub keeps
+    the latest snapshot and a short backlog of diffs, so a reconnecting client resumes from its
+    Last-Event-ID and only falls back to a full snapshot when it has fallen out of the backlog.
+
+    Every open stream holds a worker thread, so at most max_streams may be open per process; callers
+    take a slot with open_slot() before streaming and return it with close_slot().
+    """
+
+    def __init__(self, max_streams=STATUS_STREAM_MAX_CONNECTIONS):
+        self._lock = threading.Lock()
+        self._channels = {}
+        self._slots = threading.BoundedSemaphore(max_streams)
+
+    def open_slot(self):
+        """Reserve a stream slot without waiting; False when the process is at its cap."""
+        return self._slots.acquire(blocking=False)
+
+    def close_slot(self):
+        self._slots.release()
+
+    def _channel(self, user_id):
+        channel = self._channels.get(user_id)
+        if channel is None:
+            channel = self._channels[user_id] = _Channel(self._lock)
+        return channel
+
+    def has(self, user_id):
+        channel = self._channels.get(user_id)
+        return channel is not None and channel.state is not None
+
+    def publish(self, user_id, snapshot, trades=None):
+        with self._lock:
+            channel = self._channel(user_id)
+            payload = status_diff(channel.state or {}, snapshot)
+            if trades:
+                payload["new_trades"] = trades
+            channel.state = snapshot
+            if not payload:
+                return
+            channel.seq += 1
+            channel.events.append((channel.seq, json.dumps(payload, default=_json_default)))
+            channel.cond.notify_all()
+
+    def _pending(self, channel, last_seq):
+        """Events after last_seq, or a full snapshot if the client is new or too far behind."""
+        if channel.state is None:
+            return []
+        oldest = channel.events[0][0] if channel.events else channel.seq + 1
+        if last_seq is None or last_seq < oldest - 1 or last_seq > channel.seq:
+            return [(channel.seq, "snapshot", json.dumps(channel.state, default=_json_default))]
+        return [(seq, "diff", payload) for seq, payload in channel.events if seq > last_seq]
+
+    def stream(self, user_id, last_event_id=None):
+        """Yield SSE-formatted text for user_id until STATUS_STREAM_MAX_SECONDS elapse."""
+        last_seq = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+        deadline = time.monotonic() + STATUS_STREAM_MAX_SECONDS
+        yield "retry: 3000\n\n"
+        while time.monotonic() < deadline:
+            with self._lock:
+                channel = self._channel(user_id)
+                events = self._pending(channel, last_seq)
+                if not events:
+                    channel.cond.wait(min(STATUS_STREAM_HEARTBEAT_SECONDS, max(0.0, deadline - time.monotonic())))
+                    events = self._pending(channel, last_seq)
+            if not events:
+                yield ": keepalive\n\n"
+                continue
+            for seq, kind, payload in events:
+                last_seq = seq
+                yield f"id: {seq}\nevent: {kind}\ndata: {payload}\n\n"
+
+status_hub = StatusHub()
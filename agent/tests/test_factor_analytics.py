@@ -0,0 +1,78 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+import factor_analytics
+from factor_analytics import compute_factor_attribution
+from db import DEFAULT_INDICATORS
+
+def trade_frame(exit_times):
+    frame = pd.DataFrame({
+        "token": ["ATOM"] * len(exit_times),
+        "direction": ["long"] * len(exit_times),
+        "exit_time": pd.to_datetime(exit_times),
+        "profit": [1.0] * len(exit_times)
+    })
+    for factor in DEFAULT_INDICATORS:
+        frame[factor] = 0.5
+    return frame
+
+EXIT_TIMES = ["2026-10-14 13:45", "2026-10-14 14:10", "2026-10-18 23:00", "2026-10-19 01:30"]
+
+@pytest.mark.parametrize("window, expected", [
+    ("1h", {"2026-10-14T13:00:00": 1, "2026-10-14T14:00:00": 1, "2026-10-18T23:00:00": 1, "2026-10-19T01:00:00": 1}),
+    ("4h", {"2026-10-14T12:00:00": 2, "2026-10-18T20:00:00": 1, "2026-10-19T00:00:00": 1}),
+    ("1D", {"2026-10-14T00:00:00": 2, "2026-10-18T00:00:00": 1, "2026-10-19T00:00:00": 1}),
+    ("1W", {"2026-10-12T00:00:00": 3, "2026-10-19T00:00:00": 1}),
+])
+def test_attribution_buckets_every_allowed_window(window, expected):
+    results = compute_factor_attribution(trade_frame(EXIT_TIMES), window=window)
+    trades = {row["window_start"]: row["trades"] for row in results if row["factor"] == "ema"}
+    assert trades == expected
+    assert len(results) == len(expected) * len(DEFAULT_INDICATORS)
+
+def test_attribution_hit_rate_and_contribution():
+    results = compute_factor_attribution(trade_frame(EXIT_TIMES[:2]), window="1D")
+    ema = next(row for row in results if row["factor"] == "ema")
+    assert ema["hit_rate"] == 1.0
+    assert ema["pnl_contribution"] == pytest.approx(2.0 / len(DEFAULT_INDICATORS), rel=1e-4)
+    assert ema["correlation"] is None  # No variance in scores or profit
+
+def test_attribution_of_no_trades_is_empty():
+    assert compute_factor_attribution(trade_frame([]), window="1W") == []
+
+def test_unbounded_request_loads_default_range(monkeypatch):
+    ranges = []
+    def load_trade_frame(start=None, end=None, token=None):
+        ranges.append((start, end))
+        return trade_frame([])
+    monkeypatch.setattr(factor_analytics, "load_trade_frame", load_trade_frame)
+    monkeypatch.setattr(factor_analytics, "_cache", OrderedDict())
+
+    factor_analytics.get_factor_attribution(end=datetime(2026, 10, 19, 15, 30))
+    factor_analytics.get_factor_attribution()
+    factor_analytics.get_factor_attribution()
+
+    days = factor_analytics.FACTOR_ANALYTICS_DEFAULT_DAYS
+    assert ranges[0] == (datetime(2026, 10, 19) - timedelta(days=days), datetime(2026, 10, 19, 15, 30))
+    start, end = ranges[1]
+    assert start is not None and end is None
+    assert (start.hour, start.minute, start.second, start.microsecond) == (0, 0, 0, 0)
+    assert len(ranges) == 2  # The second unbounded request is served from the cache
+
+def test_cache_keeps_only_the_most_recently_used_ranges(monkeypatch):
+    loads = []
+    def load_trade_frame(start=None, end=None, token=None):
+        loads.append(token)
+        return trade_frame([])
+    monkeypatch.setattr(factor_analytics, "load_trade_frame", load_trade_frame)
+    monkeypatch.setattr(factor_analytics, "_cache", OrderedDict())
+    monkeypatch.setattr(factor_analytics, "FACTOR_ANALYTICS_CACHE_SIZE", 2)
+
+    for token in ["ATOM", "OSMO", "ATOM", "INJ", "ATOM", "OSMO"]:
+        factor_analytics.get_factor_attribution(token=token)
+
+    assert loads == ["ATOM", "OSMO", "INJ", "OSMO"]  # OSMO was evicted as least recently used when INJ arrived
+    assert len(factor_analytics._cache) == 2
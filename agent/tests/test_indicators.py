@@ -0,0 +1,59 @@
+import math
+
+import numpy as np
+import pytest
+
+from indicators import TECHNICAL_INDICATORS, ema, rsi, technical_scores
+
+NAN = math.nan
+
+def candles(n, phase, drift, volume_drift, jump=0.0):
+    """Deterministic hourly candles: a drifting sine wave, optionally breaking out on the last bar."""
+    i = np.arange(n, dtype=np.float64)
+    close = 100 + 8 * np.sin(i / 4 + phase) + drift * i
+    open_ = np.concatenate([[close[0]], close[:-1]]) + 0.5 * np.cos(i * 1.3 + phase)
+    high = np.round(np.maximum(open_, close) + 0.6 + 0.4 * np.sin(i * 0.7) ** 2, 2)
+    low = np.round(np.minimum(open_, close) - 0.6 - 0.3 * np.cos(i * 0.9) ** 2, 2)
+    volume = 1000 + 300 * np.sin(i / 3 + phase) + volume_drift * i
+    if jump:
+        close[-1] += jump
+        high[-1] = max(high[-1], close[-1] + 0.3)
+        low[-1] = min(low[-1], close[-1] - 0.3)
+    return np.stack([i * 3600, open_, high, low, close, volume], axis=1)
+
+# Captured from ta 0.11 (EMAIndicator, RSIIndicator) and the pandas scoring technical_scores() replaced.
+# Columns: candle args, scores in TECHNICAL_INDICATORS order, EMA(20), EMA(50), RSI(14) of the last close.
+REFERENCE = [
+    ((60, 1.0, 0.4, 10.0, 12), [5, 3, 2, -2, 3], 123.520108912555, 117.06609235116116, 78.1322642203387),
+    ((60, 4.0, 0.0, 10.0, -12), [-5, -3, -2, 2, -3], 96.09810044397913, 97.66195385371631, 29.630308400892176),
+    ((50, 1.0, 0.4, 10.0), [5, 0, 2, -2, 3], 114.7642968318706, 111.45857812845111, 78.5993910710085),
+    ((30, 0.0, 0.4, -10.0), [5, 0, 0, -2, 3], 107.853469686346, NAN, 81.7376318319163),
+    ((20, 2.5, 0.0, -10.0), [5, 0, 0, -2, 3], 99.97561282094571, NAN, 72.31103173103921),
+    ((14, 0.0, -0.4, -10.0), [-5, 0, 0, 2, 0], NAN, NAN, 20.562996055391707),
+    ((12, 0.0, -0.4, -10.0), [-5, 0, 0, 0, 0], NAN, NAN, NAN),
+    ((11, 1.0, -0.4, -10.0), [-5, 0, 0, 0, 0], NAN, NAN, NAN),
+    # Under 11 candles the pandas Wyckoff step raised and every score fell back to 0
+    ((10, 1.0, 0.4, 10.0), [0, 0, 0, 0, 0], NAN, NAN, NAN),
+    ((5, 1.0, 0.4, 10.0), [0, 0, 0, 0, 0], NAN, NAN, NAN),
+]
+
+@pytest.mark.parametrize("args, scores, ema_short, ema_long, rsi_value", REFERENCE)
+def test_kernels_match_ta_reference(args, scores, ema_short, ema_long, rsi_value):
+    data = candles(*args)[None]
+    close = data[:, :, 4]
+    assert ema(close, 20)[0, -1] == pytest.approx(ema_short, rel=1e-9, nan_ok=True)
+    assert ema(close, 50)[0, -1] == pytest.approx(ema_long, rel=1e-9, nan_ok=True)
+    assert rsi(close, 14)[0] == pytest.approx(rsi_value, rel=1e-9, nan_ok=True)
+    assert technical_scores(data).tolist() == [scores]
+
+def test_tokens_score_independently_in_one_batch():
+    cases = [case for case in REFERENCE if case[0][0] == 60]
+    matrix = technical_scores(np.stack([candles(*args) for args, *_ in cases]))
+    assert matrix.tolist() == [scores for _, scores, *_ in cases]
+
+def test_short_history_without_wyckoff_keeps_other_scores():
+    # Without the Wyckoff step nothing raised on short histories, so the other indicators still scored
+    data = candles(10, 1.0, 0.4, 10.0)[None]
+    enabled = [ind for ind in TECHNICAL_INDICATORS if ind != "wyckoff"]
+    assert technical_scores(data, enabled).tolist() == [[-5, 0, 0, 0, 0]]
+    assert technical_scores(data).tolist() == [[0, 0, 0, 0, 0]]
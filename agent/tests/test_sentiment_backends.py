@@ -0,0 +1,16 @@
+import pytest
+
+from sentiment_backends import parse_llm_score
+
+@pytest.mark.parametrize("reply, expected", [
+    ("3", 0.6),
+    (" -2.5\n", -0.5),
+    ("Score: 4 (positive)", 0.8),
+    ("The sentiment is 9/5", 1.0),
+    ("-12", -1.0),
+])
+def test_llm_reply_scores_are_parsed_and_clamped(reply, expected):
+    assert parse_llm_score(reply) == pytest.approx(expected)
+
+def test_llm_reply_without_a_number_is_no_score():
+    assert parse_llm_score("Mostly neutral, hard to say.") is None
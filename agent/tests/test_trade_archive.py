@@ -0,0 +1,29 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+import trade_archive
+from trade_archive import write_archive, read_archived_trades
+
+def trade(trade_id, user_id, exit_time, profit):
+    return {"trade_id": trade_id, "user_id": user_id, "token": "ATOM", "direction": "long",
+            "entry_time": exit_time, "exit_time": exit_time, "profit": Decimal(profit),
+            "entry_price": Decimal("10.5"), "exit_price": Decimal("11.25"), "factor_scores": {"ema": 1.0}}
+
+@pytest.fixture
+def archive(tmp_path, monkeypatch):
+    monkeypatch.setattr(trade_archive, "TRADE_ARCHIVE_DIR", str(tmp_path))
+    write_archive(2025, 1, [[trade(1, 1, datetime(2025, 1, 5), "1.5"), trade(2, 1, datetime(2025, 1, 20), "-0.25")],
+                            [trade(3, 2, datetime(2025, 1, 7), "2")]])
+
+def test_aware_bounds_are_compared_as_local_time(archive):
+    start = datetime(2025, 1, 10).astimezone().astimezone(timezone.utc)
+    rows = list(read_archived_trades(1, start=start))
+    assert [row["trade_id"] for row in rows] == [2]
+
+def test_rows_come_back_in_the_trades_table_shape(archive):
+    rows = list(read_archived_trades(1))
+    assert [row["trade_id"] for row in rows] == [2, 1]  # Newest first
+    assert rows[0]["profit"] == Decimal("-0.25") and rows[1]["exit_price"] == Decimal("11.25")
+    assert rows[0]["factor_scores"] == {"ema": 1.0}
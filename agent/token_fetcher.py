@@ -2,6 +2,7 @@ import requests
 import logging
 import json
 from config import COINGECKO_API_KEY
+from http_client import http_get
 
 logging.basicConfig(filename="cosmos_trading_agent.log", level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - %(message)s')
@@ -11,8 +12,7 @@ def fetch_cosmos_tokens(user_id):
     timeout = 10
 
     try:
-        response = requests.get("https://raw.githubusercontent.com/cosmos/chain-registry/master/chain.json", timeout=timeout)
-        response.raise_for_status()
+        response = http_get("https://raw.githubusercontent.com/cosmos/chain-registry/master/chain.json", timeout=timeout)
         chains = response.json()
         registry_tokens = [chain["chain_id"] for chain in chains if "cosmos" in chain["chain_name"].lower()]
         tokens.update(registry_tokens)
@@ -22,8 +22,7 @@ def fetch_cosmos_tokens(user_id):
         tokens.update(["atom", "osmo", "inj"])
 
     try:
-        response = requests.get("https://api.dexscreener.com/latest/dex/search?q=cosmos", timeout=timeout)
-        response.raise_for_status()
+        response = http_get("https://api.dexscreener.com/latest/dex/search?q=cosmos", timeout=timeout)
         pairs = response.json().get("pairs", [])
         dexscreener_tokens = {pair["baseToken"]["symbol"].lower() for pair in pairs if "cosmos" in pair["chainId"].lower()}
         tokens.update(dexscreener_tokens)
@@ -35,8 +34,7 @@ def fetch_cosmos_tokens(user_id):
         try:
             url = "https://api.coingecko.com/api/v3/coins/markets?vs_currency=usd&category=cosmos-ecosystem"
             headers = {"x-cg-api-key": COINGECKO_API_KEY}
-            response = requests.get(url, headers=headers, timeout=timeout)
-            response.raise_for_status()
+            response = http_get(url, headers=headers, timeout=timeout)
             coins = response.json()
             coingecko_tokens = {coin["symbol"].lower() for coin in coins}
             tokens.update(coingecko_tokens)
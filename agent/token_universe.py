@@ -0,0 +1,111 @@
+import threading
+import logging
+import json
+import time
+from config import TOKEN_UNIVERSE_REFRESH_SECONDS, TOKEN_UNIVERSE_MAX
+from rate_governor import rate_governor
+
+logging.basicConfig(filename="cosmos_trading_agent.log", level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+
+def market_base(ticker):
+    """Base symbol of an Injective derivative ticker, e.g. "ATOM/USDT PERP" -> "ATOM"."""
+    return ticker.split("/")[0].split(" ")[0].upper()
+
+class TokenUniverse:
+    """
+    Maps candidate token symbols to tradable Injective derivative markets.
+
+    The market list and per-market liquidity are refreshed at most every TOKEN_UNIVERSE_REFRESH_SECONDS
+    and shared by every agent. Candidates without a market are dropped before any scraping or LLM work,
+    and the rest are ranked by trailing 24h notional volume and capped at TOKEN_UNIVERSE_MAX.
+
+    Only the first load blocks callers. Later refreshes run on a background thread and swap the new maps
+    in under the lock, so market_id() lookups for exits never wait on the per-market candle calls.
+    Those calls go through the rate governor; a market refused this round keeps its previous liquidity.
+    """
+
+    def __init__(self, client, refresh_seconds=TOKEN_UNIVERSE_REFRESH_SECONDS, max_tokens=TOKEN_UNIVERSE_MAX):
+        self.client = client
+        self.refresh_seconds = refresh_seconds
+        self.max_tokens = max_tokens
+        self._lock = threading.Lock()          # Guards swapping the maps and the refreshing flag
+        self._load_lock = threading.Lock()     # Serializes the blocking first load
+        self._markets = {}    # base symbol -> market_id
+        self._liquidity = {}  # market_id -> 24h notional volume
+        self._refreshed_at = 0.0
+        self._refreshing = False
+
+    def _refresh(self):
+        markets = {}
+        for market in self.client.get_derivative_markets().markets:
+            markets.setdefault(market_base(market.ticker), market.market_id)
+        previous = self._liquidity
+        liquidity = {}
+        limited = 0
+        for market_id in markets.values():
+            if not rate_governor.admit("injective"):
+                liquidity[market_id] = previous.get(market_id, 0.0)
+                limited += 1
+                continue
+            try:
+                candles = self.client.get_historical_derivative_candles(market_id=market_id, interval="1h", limit=24)
+                liquidity[market_id] = sum(float(c.volume) * float(c.close) for c in candles.candles)
+            except Exception as e:
+                logging.error(json.dumps({"event": "market_liquidity_failed", "market_id": market_id, "error": str(e)}))
+                liquidity[market_id] = previous.get(market_id, 0.0)
+        with self._lock:
+            self._markets = markets
+            self._liquidity = liquidity
+            self._refreshed_at = time.monotonic()
+        logging.info(json.dumps({"event": "token_universe_refreshed", "markets": len(markets), "rate_limited": limited}))
+
+    def _refresh_in_background(self):
+        try:
+            self._refresh()
+        except Exception as e:
+            logging.error(json.dumps({"event": "token_universe_refresh_failed", "error": str(e)}))
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _ensure_fresh(self):
+        if not self._markets:
+            with self._load_lock:
+                if not self._markets:
+                    try:
+                        self._refresh()
+                    except Exception as e:
+                        logging.error(json.dumps({"event": "token_universe_refresh_failed", "error": str(e)}))
+                        raise
+            return
+        with self._lock:
+            if self._refreshing or time.monotonic() - self._refreshed_at <= self.refresh_seconds:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh_in_background, daemon=True).start()
+
+    def market_id(self, token):
+        self._ensure_fresh()
+        with self._lock:
+            market_id = self._markets.get(token.upper())
+        if market_id is None:
+            raise ValueError(f"No market found for token: {token}")
+        return market_id
+
+    def select(self, candidates):
+        """Tradable candidates ranked by liquidity, most liquid first, capped at max_tokens."""
+        self._ensure_fresh()
+        with self._lock:
+            markets, liquidity = self._markets, self._liquidity
+        tradable = {}
+        seen_markets = set()
+        for token in candidates:
+            market_id = markets.get(token.upper())
+            if market_id is not None and market_id not in seen_markets:
+                seen_markets.add(market_id)
+                tradable[token] = market_id
+        ranked = sorted(tradable, key=lambda t: liquidity.get(tradable[t], 0.0), reverse=True)
+        selected = ranked[:self.max_tokens]
+        logging.info(json.dumps({"event": "tokens_selected", "candidates": len(candidates), "tradable": len(tradable), "selected": len(selected)}))
+        return selected
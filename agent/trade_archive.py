@@ -0,0 +1,149 @@
+import os
+import json
+import logging
+from datetime import datetime
+from decimal import Decimal
+from clock import naive_local
+from config import TRADE_ARCHIVE_DIR
+
+logging.basicConfig(filename="cosmos_trading_agent.log", level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+
+MONEY_COLUMNS = ("profit", "entry_price", "exit_price")
+ARCHIVE_COLUMNS = ["trade_id", "user_id", "token", "direction", "entry_time", "exit_time", "profit", "entry_price", "exit_price", "factor_scores"]
+
+def _archive_schema():
+    # pyarrow is only imported when the archive is actually read or written, not whenever db is imported
+    import pyarrow as pa
+    return pa.schema([
+        ("trade_id", pa.int64()),
+        ("user_id", pa.int32()),
+        ("token", pa.string()),
+        ("direction", pa.string()),
+        ("entry_time", pa.timestamp("us")),
+        ("exit_time", pa.timestamp("us")),
+        ("profit", pa.float64()),
+        ("entry_price", pa.float64()),
+        ("exit_price", pa.float64()),
+        ("factor_scores", pa.string())
+    ])
+
+def archive_path(year, month):
+    return os.path.join(TRADE_ARCHIVE_DIR, f"trades_{year:04d}_{month:02d}.parquet")
+
+def list_archived_months():
+    """Return archived (year, month) pairs, newest first."""
+    if not os.path.isdir(TRADE_ARCHIVE_DIR):
+        return []
+    months = []
+    for name in os.listdir(TRADE_ARCHIVE_DIR):
+        if name.startswith("trades_") and name.endswith(".parquet"):
+            try:
+                year, month = name[len("trades_"):-len(".parquet")].split("_")
+                months.append((int(year), int(month)))
+            except ValueError:
+                continue
+    return sorted(months, reverse=True)
+
+def archived_row_count(year, month):
+    """Rows in a month's archive file, or None if the month has not been archived."""
+    path = archive_path(year, month)
+    if not os.path.exists(path):
+        return None
+    import pyarrow.parquet as pq
+    return pq.read_metadata(path).num_rows
+
+def _to_record(row):
+    record = {col: row.get(col) for col in ARCHIVE_COLUMNS}
+    for col in MONEY_COLUMNS:
+        if record[col] is not None:
+            record[col] = float(record[col])
+    record["factor_scores"] = json.dumps(record["factor_scores"]) if record["factor_scores"] is not None else None
+    return record
+
+def write_archive(year, month, batches):
+    """
+    Write one month of trades to a zstd-compressed Parquet file.
+
+    The file is written under a temporary name and renamed into place only once complete,
+    so a crash never leaves a partial archive that readers would pick up. Batches should arrive
+    ordered by (user_id, exit_time): each batch becomes a row group, and per-user reads prune
+    row groups by their user_id statistics.
+
+    Args:
+        year (int): Partition year
+        month (int): Partition month
+        batches (iterable): Lists of trade row dicts, ordered by user_id then exit_time
+
+    Returns:
+        int: Number of rows written
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    schema = _archive_schema()
+    os.makedirs(TRADE_ARCHIVE_DIR, exist_ok=True)
+    path = archive_path(year, month)
+    tmp_path = path + ".tmp"
+    rows_written = 0
+    try:
+        with pq.ParquetWriter(tmp_path, schema, compression="zstd") as writer:
+            for batch in batches:
+                if not batch:
+                    continue
+                writer.write_table(pa.Table.from_pylist([_to_record(row) for row in batch], schema=schema))
+                rows_written += len(batch)
+        with open(tmp_path, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        logging.info(json.dumps({"event": "trade_archive_written", "path": path, "rows": rows_written}))
+        return rows_written
+    except Exception as e:
+        logging.error(json.dumps({"event": "trade_archive_write_failed", "path": path, "error": str(e)}))
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def read_archived_trades(user_id=None, start=None, end=None, token=None):
+    """
+    Read archived trades, newest first, pruning files outside [start, end).
+
+    Args:
+        user_id (int): Restrict to one user; None reads every user's trades
+        start (datetime): Optional inclusive lower bound on exit_time; timezone-aware values are converted
+        end (datetime): Optional exclusive upper bound on exit_time; timezone-aware values are converted
+
+    Yields:
+        dict: Trade rows in the same shape as the trades table, money columns as Decimal
+    """
+    start, end = naive_local(start), naive_local(end)
+    filters = []
+    if user_id is not None:
+        filters.append(("user_id", "=", user_id))
+    if token:
+        filters.append(("token", "=", token))
+    if start:
+        filters.append(("exit_time", ">=", start))
+    if end:
+        filters.append(("exit_time", "<", end))
+    months = list_archived_months()
+    if not months:
+        return
+    import pyarrow.parquet as pq
+    for year, month in months:
+        month_start = datetime(year, month, 1)
+        month_end = datetime(year + month // 12, month % 12 + 1, 1)
+        if (start and month_end <= start) or (end and month_start >= end):
+            continue
+        try:
+            table = pq.read_table(archive_path(year, month), filters=filters or None)
+        except Exception as e:
+            logging.error(json.dumps({"event": "trade_archive_read_failed", "user_id": user_id, "year": year, "month": month, "error": str(e)}))
+            raise
+        table = table.sort_by([("exit_time", "descending")])
+        for row in table.to_pylist():
+            row["factor_scores"] = json.loads(row["factor_scores"]) if row["factor_scores"] else None
+            for col in MONEY_COLUMNS:
+                # Parquet holds float64; hand back the DECIMAL type hot rows come with
+                if row[col] is not None:
+                    row[col] = Decimal(repr(row[col]))
+            yield row
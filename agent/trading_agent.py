@@ -1,43 +1,31 @@
-import requests
-from bs4 import BeautifulSoup
-import tweepy
-import pandas as pd
-import numpy as np
 import logging
 import schedule
 import time
-from datetime import datetime
-from cosmospy import Transaction, CosmosAPI
-from injective.client import Client
-from injective.constant import Network
-from injective.composer import Composer
-from ta.trend import EMAIndicator
-from ta.momentum import RSIIndicator
 import threading
 import os
 import json
 import asyncio
-from config import COSMOS_RPC, INJECTIVE_GRPC, INJECTIVE_REST, X_API_KEY, X_API_SECRET, IBC_CHANNEL, SECRET_AI_API_KEY, WHALE_TX_THRESHOLD
+from config import IBC_CHANNEL, WHALE_TX_THRESHOLD, AGENT_CYCLE_SECONDS, BAR_BACKFILL_HOURS
+import clients
+from clock import clock
 from token_fetcher import fetch_cosmos_tokens
-from db import update_user, add_trade, update_platform_stats, get_all_trades
+from sentiment_ingest import sentiment_store, sentiment_ingestor
+from bar_store import bar_store
+from agent_state import agent_state_store, encode_state, decode_portfolio
+from risk_book import risk_book
+from status_stream import status_hub
+from factor_store import factor_store
+from rate_governor import rate_governor, start_offset, PRIORITY_EXIT, PRIORITY_ENTRY
+from db import update_user, add_trade, get_all_trades
+from platform_stats import platform_stats_view
+from profiling import profile_registry
 from bech32 import bech32_decode, bech32_encode
-from secret_ai_sdk import SecretAIClientAsync, ChatSecret
 
 logging.basicConfig(filename="cosmos_trading_agent.log", level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - %(message)s')
 
-cosmos_client = CosmosAPI(rpc_url=COSMOS_RPC)
-injective_network = Network.mainnet()
-injective_client = Client(network=injective_network, grpc_endpoint=INJECTIVE_GRPC)
-injective_composer = Composer(network=injective_network.string())
-
-if not SECRET_AI_API_KEY:
-    raise ValueError("SECRET_AI_API_KEY environment variable not set")
-secret_client_async = SecretAIClientAsync(api_key=SECRET_AI_API_KEY)
-secret_llm = ChatSecret(model="deepseek-coder:33b", api_key=SECRET_AI_API_KEY)
-
 class UserAgent:
-    def __init__(self, user_id, wallet_address, wallet_seed, total_capital, paused=False, indicators=None, weights=None, bridged_capital=0, active_capital=0):
+    def __init__(self, user_id, wallet_address, wallet_seed, total_capital, paused=False, indicators=None, weights=None, bridged_capital=0, active_capital=0, state=None):
         self.user_id = user_id
         self.wallet_address = wallet_address
         self.wallet_seed = wallet_seed
@@ -46,6 +34,7 @@ class UserAgent:
         self.max_active_capital = total_capital * 0.1
         self.leverage = 20
         self.portfolio = {}
+        self._new_trades = []  # Closed since the last status publish
         self.active_capital = active_capital
         self.bridged_capital = bridged_capital
         self.paused = paused
@@ -58,13 +47,60 @@ class UserAgent:
         self.learning_rate = 0.1
         self.discount_factor = 0.9
         self.trends = {ind: 0.0 for ind in self.indicators}  # Track trend scores
-        self.tokens = fetch_cosmos_tokens(user_id)
+        self.candidate_tokens = fetch_cosmos_tokens(user_id)
+        self.tokens = self._select_tokens()
         self.chain_addresses = self._derive_chain_addresses()
-        self.subaccount_id = "0x" + os.urandom(16).hex()
+        if state:
+            # Warm restart: resume open positions and the subaccount their orders were placed from
+            self.subaccount_id = state["subaccount_id"]
+            self.portfolio = decode_portfolio(state["portfolio"])
+            self.trends.update({ind: score for ind, score in state["trends"].items() if ind in self.trends})
+            for data in self.portfolio.values():
+                if "market_id" in data:
+                    risk_book.restore(data["market_id"], data["direction"], data["amount"] * data["entry_price"])
+        else:
+            self.subaccount_id = "0x" + os.urandom(16).hex()
+            self._persist_state(durable=True)
         if not paused:
-            self.bridge_atom_to_injective()
+            if not state:
+                self.bridge_atom_to_injective()  # A restored agent's capital was bridged before the restart
             self.start()
 
+    def _persist_state(self, durable=False):
+        try:
+            agent_state_store.record(self.user_id, encode_state(self.subaccount_id, self.portfolio, self.trends), durable=durable)
+        except Exception as e:
+            logging.error(json.dumps({"event": "persist_state_failed", "user_id": self.user_id, "error": str(e)}))
+
+    def publish_status(self):
+        """Push what changed since the last publish to this user's status stream."""
+        trades, self._new_trades = self._new_trades, []
+        status_hub.publish(self.user_id, self.status_snapshot(), trades)
+
+    def status_snapshot(self):
+        """Point-in-time copy of the fields served by /users/status, safe to serialize off the agent thread."""
+        return {
+            "user_id": self.user_id,
+            "wallet_address": self.wallet_address,
+            "paused": self.paused,
+            "total_capital": self.total_capital,
+            "bridged_capital": self.bridged_capital,
+            "active_capital": self.active_capital,
+            "indicators": list(self.indicators),
+            "weights": dict(self.weights),
+            "trends": dict(self.trends),
+            "portfolio": {token: dict(data) for token, data in dict(self.portfolio).items()}
+        }
+
+    def _select_tokens(self):
+        try:
+            tokens = clients.token_universe().select(self.candidate_tokens)
+        except Exception as e:
+            logging.error(json.dumps({"event": "select_tokens_failed", "user_id": self.user_id, "error": str(e)}))
+            return getattr(self, "tokens", [])
+        sentiment_ingestor.track(tokens)
+        return tokens
+
     def _derive_chain_addresses(self):
         try:
             hrp, data = bech32_decode(self.wallet_address)
@@ -80,10 +116,10 @@ class UserAgent:
             atom_to_bridge = min(self.total_capital * 0.5, self.total_capital - self.active_capital)
             if atom_to_bridge <= 0:
                 return
-            tx = Transaction(
+            tx = clients.cosmos_transaction_class()(
                 privkey=self.wallet_seed,
-                account_num=cosmos_client.get_account(self.wallet_address)["account_number"],
-                sequence=cosmos_client.get_account(self.wallet_address)["sequence"],
+                account_num=clients.cosmos_client().get_account(self.wallet_address)["account_number"],
+                sequence=clients.cosmos_client().get_account(self.wallet_address)["sequence"],
                 chain_id="cosmoshub-4",
                 gas=200000,
                 fee=5000
@@ -96,7 +132,7 @@ class UserAgent:
                     "token": {"denom": "uatom", "amount": str(int(atom_to_bridge * 10**6))},
                     "sender": self.wallet_address,
                     "receiver": self.chain_addresses["injective"],
-                    "timeout_height": {"revision_number": "0", "revision_height": str(cosmos_client.get_latest_block()["block"]["header"]["height"] + 1000)},
+                    "timeout_height": {"revision_number": "0", "revision_height": str(clients.cosmos_client().get_latest_block()["block"]["header"]["height"] + 1000)},
                     "timeout_timestamp": "0"
                 }
             )
@@ -107,52 +143,27 @@ class UserAgent:
         except Exception as e:
             logging.error(json.dumps({"event": "bridge_failed", "user_id": self.user_id, "error": str(e)}))
 
-    async def scrape_web_sentiment(self, token):
-        url = f"https://cointelegraph.com/search?query={token}"
-        try:
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, "html.parser")
-            articles = [a.text for a in soup.find_all("h2", class_="article-title")[:5]]
-            if not articles:
-                return 0
-            messages = [
-                ("system", "Analyze sentiment of these article titles. Score -5 (negative) to 5 (positive)."),
-                ("human", "\n".join(articles))
-            ]
-            result = await secret_llm.invoke(messages, stream=False)
-            sentiment_score = float(result.content.strip())
-            self.trends["market"] = sentiment_score / 5  # Track trend
-            logging.info(json.dumps({"event": "web_sentiment", "user_id": self.user_id, "token": token, "score": sentiment_score}))
-            return sentiment_score / 5
-        except Exception as e:
-            logging.error(json.dumps({"event": "web_sentiment_failed", "user_id": self.user_id, "token": token, "error": str(e)}))
-            return 0
+    def scrape_web_sentiment(self, token):
+        """Latest Cointelegraph headline sentiment for token from the shared ingestion store."""
+        sentiment_score = sentiment_store.score("web", token)
+        self.trends["market"] = sentiment_score  # Track trend
+        logging.info(json.dumps({"event": "web_sentiment", "user_id": self.user_id, "token": token, "score": sentiment_score}))
+        return sentiment_score
 
-    async def scrape_x_sentiment(self, token):
-        try:
-            auth = tweepy.OAuthHandler(X_API_KEY, X_API_SECRET)
-            api = tweepy.API(auth, wait_on_rate_limit=True)
-            tweets = [t.full_text for t in api.search_tweets(q=token, count=100, lang="en", tweet_mode="extended")]
-            if not tweets:
-                return 0
-            messages = [
-                ("system", "Analyze sentiment of these X posts. Score -5 (negative) to 5 (positive)."),
-                ("human", "\n".join(tweets))
-            ]
-            result = await secret_llm.invoke(messages, stream=False)
-            sentiment_score = float(result.content.strip())
-            self.trends["social"] = sentiment_score / 5  # Track trend
-            logging.info(json.dumps({"event": "x_sentiment", "user_id": self.user_id, "token": token, "score": sentiment_score}))
-            return sentiment_score / 5
-        except Exception as e:
-            logging.error(json.dumps({"event": "x_sentiment_failed", "user_id": self.user_id, "token": token, "error": str(e)}))
-            return 0
+    def scrape_x_sentiment(self, token):
+        """Latest X sentiment for token from the shared ingestion store."""
+        sentiment_score = sentiment_store.score("x", token)
+        self.trends["social"] = sentiment_score  # Track trend
+        logging.info(json.dumps({"event": "x_sentiment", "user_id": self.user_id, "token": token, "score": sentiment_score}))
+        return sentiment_score
 
     def get_whale_activity(self, token):
+        cached = rate_governor.cached("whale", token)
+        if cached is not None and not rate_governor.admit("injective"):
+            return cached
         try:
             market_id = self.get_market_id(token)
-            tx_history = injective_client.get_derivative_tx_history(market_id=market_id, limit=50)
+            tx_history = clients.injective_client().get_derivative_tx_history(market_id=market_id, limit=50)
             current_price = self.get_current_price(token)
             whale_score = 0
             for tx in tx_history.transactions:
@@ -166,16 +177,16 @@ class UserAgent:
             normalized_score = min(max(whale_score / 10, -1), 1)
             self.trends["whale"] = normalized_score  # Track trend
             logging.info(json.dumps({"event": "whale_activity", "user_id": self.user_id, "token": token, "score": normalized_score}))
-            return normalized_score
+            return rate_governor.store("whale", token, normalized_score)
         except Exception as e:
             logging.error(json.dumps({"event": "whale_activity_failed", "user_id": self.user_id, "token": token, "error": str(e)}))
             return 0
 
     def get_fundamental_score(self, token):
         try:
-            staking = injective_client.get_staking_validators()
+            staking = clients.injective_client().get_staking_validators()
             staking_yield = sum(float(v["commission"]["commission_rates"]["rate"]) for v in staking.validators) / len(staking.validators)
-            balance = injective_client.get_bank_balance(self.chain_addresses["injective"], f"peggy0x{token}")
+            balance = clients.injective_client().get_bank_balance(self.chain_addresses["injective"], f"peggy0x{token}")
             volume = float(balance.amount) / 10**18 if balance else 0
             whale_score = self.get_whale_activity(token)
             tokenomics_score = min((staking_yield * 100) + (volume / 1e6), 10) * 0.3
@@ -200,102 +211,70 @@ class UserAgent:
             logging.error(json.dumps({"event": "fundamental_score_failed", "user_id": self.user_id, "token": token, "error": str(e)}))
             return 0
 
-    def get_technical_score(self, token):
-        try:
-            price_data = self.fetch_price_data(token)
-            df = pd.DataFrame(price_data, columns=["timestamp", "open", "high", "low", "close", "volume"])
-            current_price = df["close"].iloc[-1]
-            scores = {}
-
-            if "ict" in self.indicators:
-                daily_high = df["high"].max()
-                daily_low = df["low"].min()
-                liquidity_above = daily_high * 1.01
-                liquidity_below = daily_low * 0.99
-                df["range"] = df["high"] - df["low"]
-                order_block = df["close"][df["range"] == df["range"].min()].iloc[-1]
-                df["gap"] = df["open"].shift(-1) - df["close"]
-                fvg = df["gap"][abs(df["gap"]) > df["range"].mean()].mean() or 0
-                ict_score = 0
-                if current_price > order_block and abs(current_price - liquidity_above) < 0.02 * current_price:
-                    ict_score += 5
-                elif current_price < order_block and abs(current_price - liquidity_below) < 0.02 * current_price:
-                    ict_score -= 5
-                if fvg > 0 and current_price < daily_high:
-                    ict_score += 3
-                elif fvg < 0 and current_price > daily_low:
-                    ict_score -= 3
-                scores["ict"] = ict_score
-                self.trends["ict"] = ict_score / 10  # Track trend
-
-            if "elliott" in self.indicators:
-                peaks = df["high"][(df["high"].shift(1) < df["high"]) & (df["high"].shift(-1) < df["high"])].index
-                troughs = df["low"][(df["low"].shift(1) > df["low"]) & (df["low"].shift(-1) > df["low"])].index
-                if len(peaks) >= 3 and len(troughs) >= 2:
-                    last_wave = df["close"].iloc[peaks[-1]] - df["close"].iloc[troughs[-1]] if peaks[-1] > troughs[-1] else df["close"].iloc[troughs[-1]] - df["close"].iloc[peaks[-1]]
-                    elliott_score = 3 if last_wave > 0 and current_price > df["close"].iloc[peaks[-1]] else -3 if last_wave < 0 and current_price < df["close"].iloc[troughs[-1]] else 0
-                else:
-                    elliott_score = 0
-                scores["elliott"] = elliott_score
-                self.trends["elliott"] = elliott_score / 10  # Track trend
-
-            if "ema" in self.indicators:
-                ema_short = EMAIndicator(df["close"], window=20).ema_indicator().iloc[-1]
-                ema_long = EMAIndicator(df["close"], window=50).ema_indicator().iloc[-1]
-                ema_score = 2 if ema_short > ema_long else -2 if ema_short < ema_long else 0
-                scores["ema"] = ema_score
-                self.trends["ema"] = ema_score / 10  # Track trend
-
-            if "rsi" in self.indicators:
-                rsi = RSIIndicator(df["close"], window=14).rsi().iloc[-1]
-                rsi_score = 2 if rsi < 30 else -2 if rsi > 70 else 0
-                scores["rsi"] = rsi_score
-                self.trends["rsi"] = rsi_score / 10  # Track trend
-
-            if "wyckoff" in self.indicators:
-                volume_trend = df["volume"].rolling(window=10).mean().iloc[-1]
-                price_trend = df["close"].rolling(window=10).mean().iloc[-1]
-                prev_price_trend = df["close"].rolling(window=10).mean().iloc[-11]
-                wyckoff_score = 0
-                if volume_trend > df["volume"].mean() and price_trend > prev_price_trend:
-                    wyckoff_score = 3
-                elif volume_trend > df["volume"].mean() and price_trend < prev_price_trend:
-                    wyckoff_score = -3
-                scores["wyckoff"] = wyckoff_score
-                self.trends["wyckoff"] = wyckoff_score / 10  # Track trend
-
-            logging.info(json.dumps({"event": "technical_score", "user_id": self.user_id, "token": token, "scores": scores}))
-            return scores
-        except Exception as e:
-            logging.error(json.dumps({"event": "technical_score_failed", "user_id": self.user_id, "token": token, "error": str(e)}))
-            return {ind: 0 for ind in self.indicators}
-
-    def fetch_price_data(self, token):
-        try:
-            market_id = self.get_market_id(token)
-            candles = injective_client.get_historical_derivative_candles(
-                market_id=market_id,
-                interval="1h",
-                limit=50
-            )
-            return [[float(c.timestamp), float(c.open), float(c.high), float(c.low), float(c.close), float(c.volume)] for c in candles.candles]
-        except Exception as e:
-            logging.error(json.dumps({"event": "fetch_price_data_failed", "user_id": self.user_id, "token": token, "error": str(e)}))
-            return [[i, 100 + i*0.1, 101 + i*0.1, 99 + i*0.1, 100 + i*0.1, 1000] for i in range(50)]
+    def get_technical_score(self, token, timeframe="1h"):
+        return self.get_technical_scores([token], timeframe)[token]
+
+    def get_technical_scores(self, tokens, timeframe="1h"):
+        """Score many tokens on one timeframe with one vectorized indicator pass per history length."""
+        # NumPy import deferred so that API-only processes importing this module never pay for it
+        import numpy as np
+        from indicators import TECHNICAL_INDICATORS, technical_scores
+        results = {}
+        by_length = {}
+        for token in tokens:
+            try:
+                price_data = self.fetch_price_data(token, timeframe)
+                by_length.setdefault(len(price_data), []).append((token, price_data))
+            except Exception as e:
+                logging.error(json.dumps({"event": "technical_score_failed", "user_id": self.user_id, "token": token, "error": str(e)}))
+                results[token] = {ind: 0 for ind in self.indicators}
+        for group in by_length.values():
+            try:
+                matrix = technical_scores(np.array([price_data for _, price_data in group]), self.indicators)
+            except Exception as e:
+                for token, _ in group:
+                    logging.error(json.dumps({"event": "technical_score_failed", "user_id": self.user_id, "token": token, "error": str(e)}))
+                    results[token] = {ind: 0 for ind in self.indicators}
+                continue
+            for (token, _), row in zip(group, matrix):
+                results[token] = {ind: int(row[i]) for i, ind in enumerate(TECHNICAL_INDICATORS) if ind in self.indicators}
+        for token in tokens:
+            scores = results[token]
+            for ind, score in scores.items():
+                self.trends[ind] = score / 10  # Track trend
+            logging.info(json.dumps({"event": "technical_score", "user_id": self.user_id, "token": token, "timeframe": timeframe, "scores": scores}))
+        return results
+
+    def fetch_price_data(self, token, timeframe="1h"):
+        # One hourly candle call feeds every timeframe; 4h and daily bars are resampled locally
+        if rate_governor.cached("candles", token) is None or rate_governor.admit("injective"):
+            try:
+                market_id = self.get_market_id(token)
+                candles = clients.injective_client().get_historical_derivative_candles(
+                    market_id=market_id,
+                    interval="1h",
+                    limit=50 if bar_store.has(token) else BAR_BACKFILL_HOURS
+                )
+                rows = [[float(c.timestamp), float(c.open), float(c.high), float(c.low), float(c.close), float(c.volume)] for c in candles.candles]
+                bar_store.update(token, rows)
+                rate_governor.store("candles", token, rows)
+            except Exception as e:
+                logging.error(json.dumps({"event": "fetch_price_data_failed", "user_id": self.user_id, "token": token, "error": str(e)}))
+        bars = bar_store.bars(token, timeframe)
+        if bars:
+            return bars
+        return [[i, 100 + i*0.1, 101 + i*0.1, 99 + i*0.1, 100 + i*0.1, 1000] for i in range(50)]
 
     def get_market_id(self, token):
-        markets = injective_client.get_derivative_markets()
-        for market in markets.markets:
-            if token.upper() in market.ticker:
-                return market.market_id
-        raise ValueError(f"No market found for token: {token}")
+        return clients.token_universe().market_id(token)
 
-    async def predict_movement(self, token):
-        sentiment_web = await self.scrape_web_sentiment(token)
-        sentiment_x = await self.scrape_x_sentiment(token)
-        sentiment_total = sentiment_web + sentiment_x
+    async def predict_movement(self, token, tech_scores=None):
+        # Each sentiment factor has its own source, so SENTIMENT_BACKEND_WEB/X select the backend per factor
+        sentiment_market = self.scrape_web_sentiment(token)
+        sentiment_social = self.scrape_x_sentiment(token)
         fundamental = self.get_fundamental_score(token)
-        tech_scores = self.get_technical_score(token)
+        if tech_scores is None:
+            tech_scores = self.get_technical_score(token)
 
         factor_scores = {
             "ict": tech_scores.get("ict", 0) * self.weights["ict"],
@@ -307,9 +286,9 @@ class UserAgent:
             "onchain": fundamental * self.weights["onchain"] * 0.25,
             "ecosystem": fundamental * self.weights["ecosystem"] * 0.25,
             "tvl": fundamental * self.weights["tvl"] * 0.20,
-            "social": sentiment_total * self.weights["social"],
+            "social": sentiment_social * self.weights["social"],
             "whale": self.get_whale_activity(token) * self.weights["whale"],
-            "market": sentiment_total * self.weights["market"],
+            "market": sentiment_market * self.weights["market"],
             "funding": fundamental * self.weights["funding"] * 0.25
         }
         total_score = sum(factor_scores.values())
@@ -326,11 +305,16 @@ class UserAgent:
             logging.info(json.dumps({"event": "open_position_failed", "user_id": self.user_id, "token": token, "reason": "insufficient_capital"}))
             self.bridge_atom_to_injective()
             return
+        reserved = None
         try:
             market_id = self.get_market_id(token)
             price = self.get_current_price(token)
             amount = self.trade_size * self.leverage
-            order = injective_composer.MarketOrder(
+            if not risk_book.try_open(market_id, direction, amount * price):
+                logging.info(json.dumps({"event": "open_position_failed", "user_id": self.user_id, "token": token, "reason": "concentration_cap"}))
+                return
+            reserved = (market_id, direction, amount * price)
+            order = clients.injective_composer().MarketOrder(
                 market_id=market_id,
                 subaccount_id=self.subaccount_id,
                 fee_recipient=self.chain_addresses["injective"],
@@ -338,21 +322,26 @@ class UserAgent:
                 quantity=str(amount),
                 price=str(price)
             )
-            tx_result = injective_client.create_derivative_order(order=order, private_key=self.wallet_seed)
+            tx_result = clients.injective_client().create_derivative_order(order=order, private_key=self.wallet_seed)
+            reserved = None
             self.portfolio[token] = {
+                "market_id": market_id,
                 "amount": amount,
-                "entry_time": datetime.now(),
+                "entry_time": clock.now(),
                 "entry_price": price,
                 "direction": direction,
                 "leverage": self.leverage,
                 "factor_scores": factor_scores,
                 "order_hash": tx_result["orderHash"]
             }
+            self._persist_state(durable=True)
             self.active_capital += self.trade_size
             self.bridged_capital -= self.trade_size
             update_user(self.user_id, active_capital=self.active_capital, bridged_capital=self.bridged_capital)
             logging.info(json.dumps({"event": "position_opened", "user_id": self.user_id, "token": token, "direction": direction, "amount": amount, "price": price}))
         except Exception as e:
+            if reserved:
+                risk_book.release(*reserved)
             logging.error(json.dumps({"event": "open_position_failed", "user_id": self.user_id, "token": token, "error": str(e)}))
 
     def close_position(self, token):
@@ -361,21 +350,26 @@ class UserAgent:
         try:
             data = self.portfolio[token]
             market_id = self.get_market_id(token)
-            price = self.get_current_price(token)
+            price = self.get_current_price(token, PRIORITY_EXIT)
             profit = (price - data["entry_price"]) * data["amount"] if data["direction"] == "long" else (data["entry_price"] - price) * data["amount"]
             profit *= data["leverage"]
-            injective_client.cancel_derivative_order(
+            clients.injective_client().cancel_derivative_order(
                 market_id=market_id,
                 subaccount_id=self.subaccount_id,
                 order_hash=data["order_hash"]
             )
-            add_trade(self.user_id, token, data["direction"], data["entry_time"], datetime.now(), profit, data["entry_price"], price, data["factor_scores"])
+            exit_time = clock.now()
+            add_trade(self.user_id, token, data["direction"], data["entry_time"], exit_time, profit, data["entry_price"], price, data["factor_scores"])
+            self._new_trades.append({"token": token, "direction": data["direction"], "entry_time": data["entry_time"], "exit_time": exit_time,
+                                     "profit": profit, "entry_price": data["entry_price"], "exit_price": price})
             self.active_capital -= self.trade_size
             self.bridged_capital += self.trade_size + profit / self.leverage
             update_user(self.user_id, active_capital=self.active_capital, bridged_capital=self.bridged_capital)
             self.update_weights(token, profit, data["direction"], data["factor_scores"])
             logging.info(json.dumps({"event": "position_closed", "user_id": self.user_id, "token": token, "profit": profit}))
             del self.portfolio[token]
+            risk_book.release(data.get("market_id", market_id), data["direction"], data["amount"] * data["entry_price"])
+            self._persist_state(durable=True)
         except Exception as e:
             logging.error(json.dumps({"event": "close_position_failed", "user_id": self.user_id, "token": token, "error": str(e)}))
 
@@ -391,24 +385,28 @@ class UserAgent:
             contribution = abs(score) / (abs(total_score) + 1e-6)
             delta = self.learning_rate * contribution * (reward if was_correct else -reward) * self.discount_factor
             self.weights[factor] = max(0.1, min(0.5, self.weights[factor] + delta))  # Constrain weights
-            update_platform_stats(factor, profit, was_correct)
+            platform_stats_view.record(factor, profit, was_correct)
 
         update_user(self.user_id, weights=self.weights)
         logging.info(json.dumps({"event": "weights_updated", "user_id": self.user_id, "token": token, "weights": self.weights}))
 
-    def get_current_price(self, token):
+    def get_current_price(self, token, priority=PRIORITY_ENTRY):
+        # With nothing cached to degrade to, the request goes out regardless of budget
+        cached = rate_governor.cached("price", token)
+        if cached is not None and not rate_governor.admit("injective", priority):
+            return cached
         try:
             market_id = self.get_market_id(token)
-            ticker = injective_client.get_derivative_ticker(market_id=market_id)
-            return float(ticker.ticker.price)
+            ticker = clients.injective_client().get_derivative_ticker(market_id=market_id)
+            return rate_governor.store("price", token, float(ticker.ticker.price))
         except Exception as e:
             logging.error(json.dumps({"event": "get_current_price_failed", "user_id": self.user_id, "token": token, "error": str(e)}))
             return 100
 
     def prune_trades(self):
         for token, data in list(self.portfolio.items()):
-            current_price = self.get_current_price(token)
-            time_held = (datetime.now() - data["entry_time"]).total_seconds() / 3600
+            current_price = self.get_current_price(token, PRIORITY_EXIT)
+            time_held = (clock.now() - data["entry_time"]).total_seconds() / 3600
             price_change = (current_price - data["entry_price"]) / data["entry_price"] if data["direction"] == "long" else (data["entry_price"] - current_price) / data["entry_price"]
             if (price_change < -0.05) or (time_held > 24 and abs(price_change) < 0.01):
                 self.close_position(token)
@@ -417,36 +415,54 @@ class UserAgent:
     def manage_trades(self):
         if self.paused:
             return
+        with profile_registry.profile("agent", self.user_id):
+            self._run_cycle()
+
+    def _run_cycle(self):
+        cycle_time = clock.now()
         self.total_capital = get_atom_capital(self.wallet_address)
         self.trade_size = self.total_capital * 0.001
         self.max_active_capital = self.total_capital * 0.1
         self.prune_trades()
         for token, data in list(self.portfolio.items()):
-            time_held = (datetime.now() - data["entry_time"]).total_seconds() / 3600
-            current_price = self.get_current_price(token)
+            time_held = (clock.now() - data["entry_time"]).total_seconds() / 3600
+            current_price = self.get_current_price(token, PRIORITY_EXIT)
             profit_potential = (current_price - data["entry_price"]) / data["entry_price"] if data["direction"] == "long" else (data["entry_price"] - current_price) / data["entry_price"]
             if time_held >= 72 or profit_potential >= 0.1:
                 self.close_position(token)
+        self.tokens = self._select_tokens()
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
-        for token in self.tokens:
+        candidates = [token for token in self.tokens if token not in self.portfolio]
+        tech_scores = self.get_technical_scores(candidates)
+        for token in candidates:
             if token not in self.portfolio:
-                direction, confidence, factor_scores = loop.run_until_complete(self.predict_movement(token))
+                direction, confidence, factor_scores = loop.run_until_complete(self.predict_movement(token, tech_scores[token]))
+                factor_store.record(self.user_id, token, cycle_time, factor_scores)
                 if direction:
                     self.open_position(token, direction, factor_scores)
         loop.close()
+        self._persist_state()
+        self.publish_status()
 
     def start(self):
         def run_schedule():
-            schedule.every(1).hours.do(self.manage_trades)
+            # Stagger agents across the cycle so they don't all hit providers at the top of the hour;
+            # the first cycle runs at the offset, within one period of boot, then every period after it
+            time.sleep(start_offset(self.user_id))
+            if self.paused:
+                return
+            self.manage_trades()
+            scheduler = schedule.Scheduler()
+            scheduler.every(AGENT_CYCLE_SECONDS).seconds.do(self.manage_trades)
             while not self.paused:
-                schedule.run_pending()
+                scheduler.run_pending()
                 time.sleep(60)
         threading.Thread(target=run_schedule, daemon=True).start()
 
 def get_atom_capital(wallet_address):
     try:
-        balances = cosmos_client.get_bank_balances(wallet_address)
+        balances = clients.cosmos_client().get_bank_balances(wallet_address)
         atom_balance = next((float(b["amount"]) / 10**6 for b in balances["balances"] if b["denom"] == "uatom"), 0)
         return atom_balance
     except Exception as e: